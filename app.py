@@ -1,23 +1,34 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import datetime
 import os
+from collections import Counter
 from memory_processor import (
-    process_memory,
-    generate_memory_embedding,
     recall_memories,
+    basic_memory_analysis,
     summarize_memories,
     analyze_emotion,
-    openai_available  # Import flag that indicates if OpenAI API is working
+    is_openai_available  # Reports if the OpenAI API key works
 )
 from data_store import (
     save_memory,
+    next_memory_id,
     load_memories,
     get_memory_by_id,
-    update_memory_unlock_date
+    get_memory_stats,
+    get_memories_version,
+    flush_pending_writes,
+    load_memories_df,
+    get_date_range_positions,
+    get_unlocked_mask,
+    update_memory_unlock_date,
+    hydrate_pending,
+    enrich_in_background,
+    pop_write_errors
 )
-from visualizer import generate_mind_map
-from voice_input import transcribe_voice
+from visualizer import MIND_MAP_WINDOWS, render_mind_map
+from voice_input import voice_panel
 from utils import get_current_date
 
 # Page configuration
@@ -31,6 +42,8 @@ st.set_page_config(
 # Initialize session state variables if they don't exist
 if "memories" not in st.session_state:
     st.session_state.memories = load_memories()
+    # Finish the AI processing of time capsules that unlocked since the last visit
+    hydrate_pending(st.session_state.memories)
 if "active_tab" not in st.session_state:
     st.session_state.active_tab = "Capture"
 if "search_query" not in st.session_state:
@@ -94,6 +107,10 @@ st.markdown("""
 st.markdown("<div class='main-header'>💾 MemoryVault AI</div>", unsafe_allow_html=True)
 st.markdown("### Your Digital Brain for Life Moments")
 
+# Background saves can't report errors themselves; show any that failed since the last run
+for write_error in pop_write_errors():
+    st.error(write_error)
+
 # Sidebar
 st.sidebar.image("icon.svg", width=50)
 st.sidebar.title("MemoryVault AI")
@@ -106,7 +123,7 @@ if not os.environ.get("OPENAI_API_KEY"):
     
     This app needs an OpenAI API key. Some features use fallback methods when the API is unavailable.
     """)
-elif not openai_available:
+elif not is_openai_available():
     st.sidebar.info("""
     ℹ️ **Using Fallback Methods** 
     
@@ -127,24 +144,92 @@ st.session_state.active_tab = st.sidebar.radio("Navigation", tab_options)
 # User info
 st.sidebar.markdown("---")
 st.sidebar.markdown("### Your Memory Stats")
-if st.session_state.memories:
-    st.sidebar.metric("Total Memories", len(st.session_state.memories))
-    emotions = [memory.get('emotion', 'Unknown') for memory in st.session_state.memories]
-    most_common_emotion = max(set(emotions), key=emotions.count)
-    st.sidebar.metric("Most Common Emotion", most_common_emotion)
-    
-    # Calculate locked memories (time capsules)
-    current_date = get_current_date()
-    locked_memories = [m for m in st.session_state.memories if m.get('unlock_date') and m.get('unlock_date') > current_date]
-    st.sidebar.metric("Time Capsules", len(locked_memories))
+# Aggregates are cached until the memories file changes
+memory_stats = get_memory_stats()
+if memory_stats['total']:
+    st.sidebar.metric("Total Memories", memory_stats['total'])
+    st.sidebar.metric("Most Common Emotion", memory_stats['most_common_emotion'])
+    st.sidebar.metric("Time Capsules", memory_stats['locked_count'])
 else:
     st.sidebar.write("No memories stored yet.")
 
 st.sidebar.markdown("---")
 st.sidebar.info("MemoryVault AI helps you store and recall life moments with the power of AI.")
 
-# Main content based on active tab
-if st.session_state.active_tab == "Capture":
+# Above this many results, show a table instead of memory cards
+MAX_MEMORY_CARDS = 50
+MEMORY_TABLE_COLUMNS = ['date', 'text', 'emotion', 'people', 'location']
+
+# Badge color of each emotion on memory cards
+EMOTION_COLOR = {
+    **{emotion: "#ff7675" for emotion in ("Angry", "Sad", "Frustrated")},
+    **{emotion: "#74b9ff" for emotion in ("Happy", "Excited", "Joyful")}
+}
+DEFAULT_EMOTION_COLOR = "#81ecec"
+
+# Time capsules unlocking further out than this skip AI processing until unlocked
+DEFER_AI_DAYS = 7
+
+def memory_card_html(memory):
+    """
+    Build the HTML card for a memory in the Recall tab.
+    
+    Args:
+        memory (dict): Memory to render
+        
+    Returns:
+        str: Card HTML
+    """
+    emotion_color = EMOTION_COLOR.get(memory.get('emotion'), DEFAULT_EMOTION_COLOR)
+    
+    people_html = f"<span class='memory-people'>With: {', '.join(memory.get('people', []))}</span>" if memory.get('people') else ""
+    location_html = f"<span class='memory-location'>@ {memory.get('location')}</span>" if memory.get('location') and memory.get('location') != 'Unknown' else ""
+    
+    return (
+        f"<div class='memory-card'>"
+        f"<div class='memory-date'>{memory.get('date')}</div>"
+        f"<p>{memory.get('text')}</p>"
+        f"<span class='memory-emotion' style='background-color: {emotion_color};'>{memory.get('emotion', 'Unknown')}</span>"
+        f"{people_html}{location_html}"
+        f"</div>"
+    )
+
+def capsule_card_html(capsule, locked):
+    """
+    Build the HTML card for a time capsule.
+    
+    Args:
+        capsule (dict): Time capsule memory
+        locked (bool): Whether the capsule is still locked
+        
+    Returns:
+        str: Card HTML
+    """
+    if locked:
+        color = "#ffeaa7"
+        unlock_date = datetime.datetime.fromisoformat(capsule.get('unlock_date')).date()
+        days_until_unlock = (unlock_date - datetime.date.today()).days
+        unlock_line = f"Unlocks in: {days_until_unlock} days ({unlock_date.strftime('%B %d, %Y')})"
+        body = "This time capsule is locked until the unlock date."
+    else:
+        color = "#55efc4"
+        unlock_line = f"Unlocked on: {capsule.get('unlock_date')}"
+        body = capsule.get('text')
+    
+    return (
+        f"<div class='memory-card' style='border-left: 5px solid {color};'>"
+        f"<div class='memory-date'>Created on: {capsule.get('date')[:10]}</div>"
+        f"<div class='memory-date'>{unlock_line}</div>"
+        f"<p>{body}</p>"
+        f"<span class='memory-emotion' style='background-color: {color};'>{capsule.get('emotion', 'Unknown')}</span>"
+        f"</div>"
+    )
+
+# Main content, one fragment per tab: widget interactions inside a tab
+# rerun only that tab instead of the whole script
+@st.fragment
+def _tab_capture():
+    """Render the Capture tab."""
     st.markdown("<div class='sub-header'>📝 Capture New Memory</div>", unsafe_allow_html=True)
     
     # Memory input options
@@ -155,10 +240,9 @@ if st.session_state.active_tab == "Capture":
         memory_text = st.text_area("Enter your memory:", height=150,
                                    placeholder="What would you like to remember? Share your thoughts, ideas, or experiences...")
     else:  # Voice input
-        memory_text = transcribe_voice()
-        if memory_text:
-            st.success("Voice captured successfully!")
-            st.write(f"**Transcribed text:** {memory_text}")
+        # Uploading audio only reruns the voice panel; it leaves the text here
+        voice_panel()
+        memory_text = st.session_state.get('transcript', "")
     
     # Additional memory metadata
     col1, col2 = st.columns(2)
@@ -180,50 +264,54 @@ if st.session_state.active_tab == "Capture":
     # Save memory
     if st.button("Save Memory"):
         if memory_text:
-            with st.spinner("Processing your memory..."):
-                # Display API notice
-                st.info("Analyzing your memory with AI... If the OpenAI API quota is exceeded, we'll use basic text analysis instead.")
-                
-                # Process the memory with AI
-                processed_memory = process_memory(memory_text)
-                
-                # Extract relevant information
-                emotion = processed_memory.get('emotion', 'Neutral')
-                topics = processed_memory.get('topics', [])
-                context = processed_memory.get('context', '')
-                
-                # Create people list from input
-                people = [p.strip() for p in people_involved.split(',')] if people_involved else []
-                
-                # Generate embedding for similarity search
-                embedding = generate_memory_embedding(memory_text)
-                
-                # Create memory object
-                memory = {
-                    'id': len(st.session_state.memories) + 1,
-                    'text': memory_text,
-                    'date': get_current_date(),
-                    'emotion': emotion,
-                    'people': people,
-                    'location': location if location else 'Unknown',
-                    'topics': topics,
-                    'context': context,
-                    'embedding': embedding,
-                    'unlock_date': unlock_date.isoformat() if unlock_date else None
-                }
-                
-                # Save to storage
-                save_memory(memory)
-                
-                # Update session state
-                st.session_state.memories = load_memories()
-                
-                st.success("Memory saved successfully!")
-                st.json(memory)
+            # Quick offline analysis now; the AI analysis and embedding run in
+            # the background so saving doesn't wait on the API
+            processed_memory = basic_memory_analysis(memory_text)
+            
+            # Extract relevant information
+            emotion = processed_memory.get('emotion', 'Neutral')
+            topics = processed_memory.get('topics', [])
+            context = processed_memory.get('context', '')
+            
+            # Create people list from input
+            people = [p.strip() for p in people_involved.split(',')] if people_involved else []
+            
+            # Create memory object
+            memory = {
+                'id': next_memory_id(),
+                'text': memory_text,
+                'date': get_current_date(),
+                'emotion': emotion,
+                'people': people,
+                'location': location if location else 'Unknown',
+                'topics': topics,
+                'context': context,
+                'unlock_date': unlock_date.isoformat() if unlock_date else None,
+                'pending_ai': True
+            }
+            
+            # Save to storage (also appends it to the session's memories)
+            save_memory(memory)
+            enrich_in_background(memory)
+            
+            # Wait for the append, then rerun the whole app so the sidebar
+            # stats include the new memory
+            flush_pending_writes()
+            st.session_state.saved_memory = memory
+            st.rerun()
         else:
             st.error("Please enter a memory before saving.")
+    
+    # Confirm a save made just before the rerun
+    saved_memory = st.session_state.pop('saved_memory', None)
+    if saved_memory:
+        st.success("Memory saved successfully!")
+        st.info("Analyzing your memory with AI in the background... If the OpenAI API quota is exceeded, we'll use basic text analysis instead.")
+        st.json(saved_memory)
 
-elif st.session_state.active_tab == "Recall":
+@st.fragment
+def _tab_recall():
+    """Render the Recall tab."""
     st.markdown("<div class='sub-header'>🔍 Recall Memories</div>", unsafe_allow_html=True)
     
     # Search and filter options
@@ -239,19 +327,12 @@ elif st.session_state.active_tab == "Recall":
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        # Get unique emotions from memories
-        all_emotions = set()
-        for memory in st.session_state.memories:
-            all_emotions.add(memory.get('emotion', 'Unknown'))
-        emotion_filter = st.selectbox("Filter by emotion:", ["All"] + sorted(list(all_emotions)))
+        # Unique emotions across all memories, already sorted
+        emotion_filter = st.selectbox("Filter by emotion:", ["All"] + memory_stats['emotions'])
     
     with col2:
-        # Get unique people from memories
-        all_people = set()
-        for memory in st.session_state.memories:
-            for person in memory.get('people', []):
-                all_people.add(person)
-        person_filter = st.selectbox("Filter by person:", ["All"] + sorted(list(all_people)))
+        # Unique people across all memories, already sorted
+        person_filter = st.selectbox("Filter by person:", ["All"] + memory_stats['people'])
     
     with col3:
         date_range = st.date_input("Date range:",
@@ -268,62 +349,66 @@ elif st.session_state.active_tab == "Recall":
             st.write(f"Found {len(recalled_memories)} relevant memories:")
             filtered_memories = recalled_memories
     else:
-        # Apply filters
+        # Apply filters as a single boolean mask over the cached DataFrame
         current_date = get_current_date()
-        filtered_memories = st.session_state.memories
+        # One version for every read below, so a write landing mid-render
+        # can't leave the mask and positions different lengths
+        version = get_memories_version()
+        memories_df = load_memories_df(version)
         
-        # Filter unlocked memories
-        filtered_memories = [m for m in filtered_memories 
-                            if not m.get('unlock_date') or m.get('unlock_date') <= current_date]
+        # Filter unlocked memories (no unlock date is stored as '')
+        mask = memories_df['unlock_date'] <= current_date
         
         # Apply emotion filter
         if emotion_filter != "All":
-            filtered_memories = [m for m in filtered_memories if m.get('emotion') == emotion_filter]
+            mask &= memories_df['emotion'] == emotion_filter
         
         # Apply person filter
         if person_filter != "All":
-            filtered_memories = [m for m in filtered_memories if person_filter in m.get('people', [])]
+            mask &= memories_df['people'].explode().eq(person_filter).groupby(level=0).any()
         
-        # Apply date filter
+        # Apply date filter with a binary search over the sorted dates
         if len(date_range) == 2:
             start_date, end_date = date_range
-            filtered_memories = [
-                m for m in filtered_memories
-                if start_date.isoformat() <= m.get('date')[:10] <= end_date.isoformat()
-            ]
+            in_range = np.zeros(len(memories_df), dtype=bool)
+            in_range[get_date_range_positions(start_date.isoformat(), end_date.isoformat(), version)] = True
+            mask &= in_range
+        
+        filtered_memories = memories_df.loc[mask].to_dict('records')
     
     # Display filtered memories
     if filtered_memories:
-        for memory in filtered_memories:
-            with st.container():
-                st.markdown(f"""
-                <div class='memory-card'>
-                    <div class='memory-date'>{memory.get('date')}</div>
-                    <p>{memory.get('text')}</p>
-                    <span class='memory-emotion' style='background-color: {"#ff7675" if memory.get("emotion") in ["Angry", "Sad", "Frustrated"] else "#74b9ff" if memory.get("emotion") in ["Happy", "Excited", "Joyful"] else "#81ecec"};'>
-                        {memory.get('emotion', 'Unknown')}
-                    </span>
-                    {f"<span class='memory-people'>With: {', '.join(memory.get('people', []))}</span>" if memory.get('people') else ""}
-                    {f"<span class='memory-location'>@ {memory.get('location')}</span>" if memory.get('location') and memory.get('location') != 'Unknown' else ""}
-                </div>
-                """, unsafe_allow_html=True)
+        if len(filtered_memories) > MAX_MEMORY_CARDS:
+            # Large result sets go through the dataframe's Arrow path
+            st.dataframe(pd.DataFrame(filtered_memories, columns=MEMORY_TABLE_COLUMNS),
+                         use_container_width=True, hide_index=True)
+        else:
+            # Send all cards in a single markdown element
+            st.markdown("".join(memory_card_html(memory) for memory in filtered_memories),
+                        unsafe_allow_html=True)
     else:
         st.info("No memories found with the current filters. Try adjusting your search parameters.")
 
-elif st.session_state.active_tab == "Mind Map":
+@st.fragment
+def _tab_mind_map():
+    """Render the Mind Map tab."""
     st.markdown("<div class='sub-header'>🧠 Memory Mind Map</div>", unsafe_allow_html=True)
     
     if st.session_state.memories:
-        # Get unlocked memories
-        current_date = get_current_date()
-        available_memories = [m for m in st.session_state.memories 
-                             if not m.get('unlock_date') or m.get('unlock_date') <= current_date]
+        # Get unlocked memories with one vectorized comparison, both reads
+        # at the same version so the mask matches the DataFrame
+        version = get_memories_version()
+        unlocked = get_unlocked_mask(get_current_date(), version)
+        available_memories = load_memories_df(version).loc[unlocked].to_dict('records')
         
         if available_memories:
-            # Generate and display mind map
+            window = st.radio("Show memories from:", list(MIND_MAP_WINDOWS), index=len(MIND_MAP_WINDOWS) - 1,
+                              horizontal=True)
+            
+            # Generate and display mind map; every window is built on the
+            # first render so switching between them is instant
             with st.spinner("Generating mind map..."):
-                mind_map_fig = generate_mind_map(available_memories)
-                st.plotly_chart(mind_map_fig, use_container_width=True)
+                render_mind_map(available_memories, window)
                 
             # Display memory connections explanation
             st.markdown("### Understanding Your Memory Connections")
@@ -333,6 +418,7 @@ elif st.session_state.active_tab == "Mind Map":
             - **People** (orange lines)
             - **Emotions** (green lines)
             - **Locations** (purple lines)
+            - **Similar meaning** (pink lines)
             
             The size of each node represents how many connections that memory has to other memories.
             """)
@@ -341,7 +427,9 @@ elif st.session_state.active_tab == "Mind Map":
     else:
         st.info("No memories stored yet. Add some memories to see your mind map.")
 
-elif st.session_state.active_tab == "Time Capsule":
+@st.fragment
+def _tab_time_capsule():
+    """Render the Time Capsule tab."""
     st.markdown("<div class='sub-header'>⏰ Time Capsule Memories</div>", unsafe_allow_html=True)
     
     # Create new time capsule section
@@ -364,39 +452,43 @@ elif st.session_state.active_tab == "Time Capsule":
     if st.button("Create Time Capsule"):
         if time_capsule_text:
             with st.spinner("Creating your time capsule..."):
-                # Process the memory
-                processed_memory = process_memory(time_capsule_text)
-                topics = processed_memory.get('topics', [])
-                context = processed_memory.get('context', '')
-                
-                # Generate embedding
-                embedding = generate_memory_embedding(time_capsule_text)
+                # Capsules that stay locked for a long time are analyzed when
+                # they unlock (see hydrate_pending); others in the background
+                defer_ai = capsule_unlock_date > datetime.date.today() + datetime.timedelta(days=DEFER_AI_DAYS)
                 
                 # Create memory object
                 memory = {
-                    'id': len(st.session_state.memories) + 1,
+                    'id': next_memory_id(),
                     'text': time_capsule_text,
                     'date': get_current_date(),
                     'emotion': capsule_emotion,
                     'people': [],
                     'location': 'Time Capsule',
-                    'topics': topics,
-                    'context': context,
-                    'embedding': embedding,
+                    'topics': [],
+                    'context': '',
                     'unlock_date': capsule_unlock_date.isoformat(),
-                    'is_time_capsule': True
+                    'is_time_capsule': True,
+                    'pending_ai': True
                 }
                 
-                # Save to storage
+                # Save to storage (also appends it to the session's memories)
                 save_memory(memory)
+                if not defer_ai:
+                    enrich_in_background(memory)
                 
-                # Update session state
-                st.session_state.memories = load_memories()
-                
-                st.success(f"Time capsule created! It will be unlocked on {capsule_unlock_date.strftime('%B %d, %Y')}.")
+                # Wait for the append, then rerun the whole app so the sidebar
+                # stats include the new capsule
+                flush_pending_writes()
+                st.session_state.created_capsule_unlock_date = capsule_unlock_date
+                st.rerun()
         else:
             st.error("Please enter a message before creating a time capsule.")
     
+    # Confirm a capsule created just before the rerun
+    created_unlock_date = st.session_state.pop('created_capsule_unlock_date', None)
+    if created_unlock_date:
+        st.success(f"Time capsule created! It will be unlocked on {created_unlock_date.strftime('%B %d, %Y')}.")
+    
     # Display time capsules
     st.markdown("---")
     st.markdown("### Your Time Capsules")
@@ -416,50 +508,29 @@ elif st.session_state.active_tab == "Time Capsule":
         # Display locked capsules
         if locked_capsules:
             st.markdown("#### 🔒 Locked Time Capsules")
-            for capsule in locked_capsules:
-                unlock_date = datetime.datetime.fromisoformat(capsule.get('unlock_date')).date()
-                days_until_unlock = (unlock_date - datetime.date.today()).days
-                
-                with st.container():
-                    st.markdown(f"""
-                    <div class='memory-card' style='border-left: 5px solid #ffeaa7;'>
-                        <div class='memory-date'>Created on: {capsule.get('date')[:10]}</div>
-                        <div class='memory-date'>Unlocks in: {days_until_unlock} days ({unlock_date.strftime('%B %d, %Y')})</div>
-                        <p>This time capsule is locked until the unlock date.</p>
-                        <span class='memory-emotion' style='background-color: #ffeaa7;'>
-                            {capsule.get('emotion', 'Unknown')}
-                        </span>
-                    </div>
-                    """, unsafe_allow_html=True)
+            st.markdown("".join(capsule_card_html(capsule, locked=True) for capsule in locked_capsules),
+                        unsafe_allow_html=True)
         
         # Display unlocked capsules
         if unlocked_capsules:
             st.markdown("#### 🔓 Unlocked Time Capsules")
-            for capsule in unlocked_capsules:
-                with st.container():
-                    st.markdown(f"""
-                    <div class='memory-card' style='border-left: 5px solid #55efc4;'>
-                        <div class='memory-date'>Created on: {capsule.get('date')[:10]}</div>
-                        <div class='memory-date'>Unlocked on: {capsule.get('unlock_date')}</div>
-                        <p>{capsule.get('text')}</p>
-                        <span class='memory-emotion' style='background-color: #55efc4;'>
-                            {capsule.get('emotion', 'Unknown')}
-                        </span>
-                    </div>
-                    """, unsafe_allow_html=True)
+            st.markdown("".join(capsule_card_html(capsule, locked=False) for capsule in unlocked_capsules),
+                        unsafe_allow_html=True)
     else:
         st.info("You don't have any time capsules yet. Create one to leave a message for your future self!")
 
-elif st.session_state.active_tab == "Summaries":
+@st.fragment
+def _tab_summaries():
+    """Render the Summaries tab."""
     st.markdown("<div class='sub-header'>📊 Memory Summaries</div>", unsafe_allow_html=True)
     
     if st.session_state.memories:
-        # Get unlocked memories
-        current_date = get_current_date()
-        available_memories = [m for m in st.session_state.memories 
-                             if not m.get('unlock_date') or m.get('unlock_date') <= current_date]
+        # Check for unlocked memories with one vectorized comparison; later
+        # reads use the same version so the positions match the mask
+        version = get_memories_version()
+        unlocked = get_unlocked_mask(get_current_date(), version)
         
-        if available_memories:
+        if unlocked.any():
             # Time period selection
             summary_period = st.selectbox(
                 "Generate summary for:",
@@ -482,10 +553,10 @@ elif st.session_state.active_tab == "Summaries":
                     else:  # All Time
                         start_date = "1900-01-01"  # Very early date to include everything
                     
-                    filtered_memories = [
-                        m for m in available_memories
-                        if m.get('date')[:10] >= start_date
-                    ]
+                    # Binary search for the period, then drop still-locked capsules
+                    positions = get_date_range_positions(start_date, version=version)
+                    positions = positions[unlocked[positions]]
+                    filtered_memories = load_memories_df(version).iloc[positions].to_dict('records')
                     
                     if filtered_memories:
                         # Generate summary
@@ -496,33 +567,20 @@ elif st.session_state.active_tab == "Summaries":
                         st.markdown(summary)
                         
                         # Emotion analysis
-                        emotions = [m.get('emotion', 'Unknown') for m in filtered_memories]
-                        emotion_counts = {}
-                        for emotion in emotions:
-                            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+                        emotion_counts = Counter(m.get('emotion', 'Unknown') for m in filtered_memories)
                         
                         # Create emotion chart
-                        emotion_df = pd.DataFrame({
-                            'Emotion': list(emotion_counts.keys()),
-                            'Count': list(emotion_counts.values())
-                        })
-                        emotion_df = emotion_df.sort_values('Count', ascending=False)
+                        emotion_df = pd.DataFrame(emotion_counts.most_common(), columns=['Emotion', 'Count'])
                         
                         st.markdown("### Emotion Distribution")
                         st.bar_chart(emotion_df.set_index('Emotion'))
                         
                         # People mentioned
-                        people_counts = {}
-                        for memory in filtered_memories:
-                            for person in memory.get('people', []):
-                                people_counts[person] = people_counts.get(person, 0) + 1
+                        people_counts = Counter(person for memory in filtered_memories
+                                                for person in memory.get('people', []))
                         
                         if people_counts:
-                            people_df = pd.DataFrame({
-                                'Person': list(people_counts.keys()),
-                                'Mentions': list(people_counts.values())
-                            })
-                            people_df = people_df.sort_values('Mentions', ascending=False).head(10)
+                            people_df = pd.DataFrame(people_counts.most_common(10), columns=['Person', 'Mentions'])
                             
                             st.markdown("### Most Mentioned People")
                             st.bar_chart(people_df.set_index('Person'))
@@ -533,6 +591,15 @@ elif st.session_state.active_tab == "Summaries":
     else:
         st.info("No memories stored yet. Add some memories to generate summaries.")
 
+tab_renderers = {
+    "Capture": _tab_capture,
+    "Recall": _tab_recall,
+    "Mind Map": _tab_mind_map,
+    "Time Capsule": _tab_time_capsule,
+    "Summaries": _tab_summaries
+}
+tab_renderers[st.session_state.active_tab]()
+
 # Footer
 st.markdown("---")
 st.markdown("MemoryVault AI - Your personal memory assistant powered by AI")
@@ -1,12 +1,68 @@
 import os
+import sys
 import json
+import atexit
 import pickle
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import numpy as np
+import pandas as pd
 import streamlit as st
+from memory_processor import EMBED_DIM, batch_generate_memory_embeddings
+from utils import get_current_date
+
+try:
+    import fcntl
+except ImportError:
+    # fcntl is POSIX-only; appends are left unlocked elsewhere
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:
+    # The standard library encoder is slower but produces the same log
+    orjson = None
+
+try:
+    import faiss
+except ImportError:
+    # Semantic search falls back to a NumPy matrix product without FAISS
+    faiss = None
 
 # Constants
 DATA_DIRECTORY = "data"
-MEMORIES_FILE = "memories.pkl"
+MEMORIES_FILE = "memories.jsonl"
+LEGACY_MEMORIES_FILE = "memories.pkl"
+# Version 1 was the pickled list; version 2 is the JSONL log plus embedding matrix
+FORMAT_VERSION = 2
+EMBEDDINGS_FILE = "embeddings.f16"
+# Width of the embedding matrix (text-embedding-ada-002); shorter vectors are zero-padded
+EMBEDDING_DIM = EMBED_DIM
+# Rewrite the log once it holds this many records per live memory
+COMPACTION_RATIO = 2
+# Don't bother compacting logs smaller than this
+COMPACTION_MIN_RECORDS = 100
+# Saves queued on the writer thread before save_memory waits for the oldest
+MAX_PENDING_WRITES = 32
+# Threads analyzing and embedding newly saved memories with the API
+ENRICHMENT_WORKERS = 4
+# Above this many vectors, use an approximate HNSW index instead of exact search
+HNSW_THRESHOLD = 10000
+# Columns of the memories DataFrame and the value used when a memory lacks one
+DATAFRAME_COLUMNS = {
+    'id': None,
+    'text': '',
+    'date': '',
+    'emotion': 'Unknown',
+    'people': [],
+    'location': 'Unknown',
+    'topics': [],
+    'context': '',
+    'unlock_date': '',
+    'is_time_capsule': False
+}
 
 def ensure_data_directory():
     """Ensure the data directory exists"""
@@ -17,6 +73,562 @@ def get_data_file_path():
     ensure_data_directory()
     return os.path.join(DATA_DIRECTORY, MEMORIES_FILE)
 
+def _encode_record(record):
+    """Serialize one log record as a single JSON line."""
+    if orjson:
+        return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+    return (json.dumps(record, separators=(',', ':')) + "\n").encode('utf-8')
+
+def _decode_record(line):
+    """Parse one log line. Raises ValueError if the line is malformed."""
+    if orjson:
+        return orjson.loads(line)
+    return json.loads(line)
+
+def _log_header():
+    """First line of every log file, recording the storage format."""
+    return _encode_record({'format_version': FORMAT_VERSION})
+
+def _locked_append(path, payload, header=b""):
+    """
+    Append bytes to a file under an exclusive lock.
+    
+    Args:
+        path (str): File to append to
+        payload (bytes): Data to append
+        header (bytes): Data to write first if the file is empty
+        
+    Returns:
+        int: Size of the file before the append
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        offset = os.fstat(fd).st_size
+        if offset == 0 and header:
+            os.write(fd, header)
+        os.write(fd, payload)
+        return offset
+    finally:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+def _append_records(records):
+    """
+    Append records to the end of the memories log in a single write.
+    
+    Args:
+        records (list): Memory dicts or tombstones to append
+    """
+    payload = b"".join(_encode_record(record) for record in records)
+    _locked_append(get_data_file_path(), payload, header=_log_header())
+
+# Writes run on a single background thread so they reach the log in order
+_save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-writer")
+_pending_writes = deque()
+_pending_lock = threading.Lock()
+# Let queued writes finish before the interpreter exits
+atexit.register(_save_executor.shutdown, wait=True)
+
+# New memories are analyzed with the API here after they are saved. Registered
+# after the writer, so at exit it drains first and its writes still land
+_enrichment_executor = ThreadPoolExecutor(max_workers=ENRICHMENT_WORKERS,
+                                          thread_name_prefix="memory-enrichment")
+atexit.register(_enrichment_executor.shutdown, wait=True)
+
+def _submit_write(write, *args):
+    """
+    Queue a write on the background writer thread.
+    
+    The backlog is bounded: once MAX_PENDING_WRITES writes are queued, the
+    caller waits for the oldest one to finish.
+    
+    Args:
+        write (callable): Function performing the write
+        *args: Arguments for the function
+    """
+    with _pending_lock:
+        while _pending_writes and (len(_pending_writes) >= MAX_PENDING_WRITES
+                                   or _pending_writes[0].done()):
+            _pending_writes.popleft().result()
+        _pending_writes.append(_save_executor.submit(write, *args))
+
+def flush_pending_writes():
+    """Wait until every queued write has reached disk."""
+    with _pending_lock:
+        while _pending_writes:
+            _pending_writes.popleft().result()
+
+# Errors from background writes, shown by the app on its next rerun
+_write_errors = deque()
+
+def _report_write_error(message):
+    """
+    Log a failed background write and keep it for the UI.
+    
+    There's no Streamlit context on the writer thread, so the error is
+    printed here and shown by whichever session reruns next.
+    
+    Args:
+        message (str): Description of the failure
+    """
+    print(message)
+    _write_errors.append(message)
+
+def pop_write_errors():
+    """
+    Take the errors from background writes that haven't been shown yet.
+    
+    Returns:
+        list: Error messages, oldest first
+    """
+    errors = []
+    while _write_errors:
+        errors.append(_write_errors.popleft())
+    return errors
+
+def _write_records(records, updates_only=False):
+    """
+    Write records to disk; runs on the writer thread.
+    
+    Callers pass copies, so no other thread changes a record while it is
+    being serialized. Inline 'embedding' vectors are moved into the matrix
+    here, and every other record gets the row its memory has on disk, since
+    a compaction may have renumbered the rows a session still holds.
+    
+    Args:
+        records (list): Memory dicts or tombstones to append to the log
+        updates_only (bool): Drop records of memories that are no longer
+            live, so a memory deleted while it was being enriched stays deleted
+    """
+    try:
+        live = _live_embedding_rows()
+        if updates_only:
+            records = [record for record in records if record.get('id') in live]
+            if not records:
+                return
+        embedded = {id(record) for record in _store_embeddings(records)}
+        for record in records:
+            memory_id = record.get('id')
+            if record.get('_deleted'):
+                live.pop(memory_id, None)
+                continue
+            if id(record) not in embedded:
+                record.pop('embedding_row', None)
+                record.pop('embedding_dim', None)
+                row, dim = live.get(memory_id, (None, None))
+                if row is not None:
+                    record['embedding_row'] = row
+                    record['embedding_dim'] = dim
+            live[memory_id] = (record.get('embedding_row'), record.get('embedding_dim'))
+        _append_records(records)
+        _refresh_memories_version()
+        _invalidate_caches()
+    except Exception as e:
+        _report_write_error(f"Failed to write memories: {e}")
+
+class EmbeddingMatrix:
+    """
+    Append-only float16 matrix of memory embeddings stored in a flat file.
+    
+    Row i holds the embedding of the memory whose 'embedding_row' is i.
+    Storing vectors here instead of inside each memory dict keeps the log
+    small and lets search read all embeddings as one contiguous array.
+    """
+    
+    def __init__(self, path, dim=EMBEDDING_DIM):
+        self.path = path
+        self.dim = dim
+        self.row_bytes = dim * np.dtype(np.float16).itemsize
+    
+    def __len__(self):
+        try:
+            return os.path.getsize(self.path) // self.row_bytes
+        except FileNotFoundError:
+            return 0
+    
+    def _to_row(self, embedding):
+        """
+        L2-normalize an embedding and zero-pad (or truncate) it to the matrix
+        width as float16. Only directions matter for cosine similarity, and
+        unit vectors use float16's precision evenly across memories.
+        """
+        row = np.zeros(self.dim, dtype=np.float16)
+        values = np.asarray(embedding, dtype=np.float32)[:self.dim]
+        norm = np.linalg.norm(values)
+        if norm > 0:
+            values = values / norm
+        row[:len(values)] = values
+        return row
+    
+    def append(self, embedding):
+        """
+        Append an embedding as a new row.
+        
+        Args:
+            embedding (list): Vector embedding of a memory
+            
+        Returns:
+            int: Index of the new row
+        """
+        return self.extend([embedding])
+    
+    def extend(self, embeddings):
+        """
+        Append several embeddings as consecutive rows in a single write.
+        
+        Args:
+            embeddings (list): Vector embeddings, in order
+            
+        Returns:
+            int: Index of the first new row
+        """
+        payload = b"".join(self._to_row(embedding).tobytes() for embedding in embeddings)
+        offset = _locked_append(self.path, payload)
+        return offset // self.row_bytes
+    
+    def rows(self):
+        """
+        Get a read-only view of the whole matrix.
+        
+        Returns:
+            numpy.ndarray: Array of shape (number of rows, dim)
+        """
+        count = len(self)
+        if count == 0:
+            return np.zeros((0, self.dim), dtype=np.float16)
+        return np.memmap(self.path, dtype=np.float16, mode='r', shape=(count, self.dim))
+    
+    def replace(self, embeddings):
+        """
+        Atomically replace the matrix contents, e.g. when compacting.
+        
+        Args:
+            embeddings (list): Vectors for the new rows, in order
+        """
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'wb') as f:
+            for embedding in embeddings:
+                f.write(self._to_row(embedding).tobytes())
+        os.replace(temp_path, self.path)
+
+class VectorStore:
+    """
+    FAISS index over the embeddings of one dimension.
+    
+    Exact flat indexes are rebuilt in memory, since adding the vectors
+    already held by _embedding_vectors is cheaper than reading and
+    rewriting an index file. HNSW indexes are expensive to build, so they
+    are persisted with the memory IDs in index order saved next to them; a
+    later run reuses one as-is when the embeddings haven't changed, or just
+    adds the new vectors when memories were only appended.
+    """
+    
+    def __init__(self, directory, dim):
+        self.dim = dim
+        self.index_path = os.path.join(directory, f"faiss_{dim}.index")
+        self.ids_path = os.path.join(directory, f"faiss_{dim}.ids.json")
+    
+    def load(self):
+        """
+        Read the saved index.
+        
+        Returns:
+            tuple: (faiss.Index, list of memory IDs), or (None, []) if there
+            is no usable saved index
+        """
+        try:
+            with open(self.ids_path, 'r') as f:
+                ids = json.load(f)
+            index = faiss.read_index(self.index_path)
+        except Exception:
+            return None, []
+        if index.d != self.dim or index.ntotal != len(ids):
+            return None, []
+        return index, ids
+    
+    def save(self, index, ids):
+        """
+        Atomically write the index and its memory IDs.
+        
+        Args:
+            index (faiss.Index): The index to save
+            ids (list): Memory IDs in index order
+        """
+        faiss.write_index(index, self.index_path + ".tmp")
+        with open(self.ids_path + ".tmp", 'w') as f:
+            json.dump(ids, f)
+        os.replace(self.index_path + ".tmp", self.index_path)
+        os.replace(self.ids_path + ".tmp", self.ids_path)
+    
+    def sync(self, ids, vectors):
+        """
+        Build the index for the given embeddings, reusing a saved HNSW index.
+        
+        Args:
+            ids (list): Memory IDs, one per row of vectors
+            vectors (numpy.ndarray): L2-normalized float32 embeddings
+            
+        Returns:
+            faiss.Index: Index whose positions match ids
+        """
+        if len(ids) <= HNSW_THRESHOLD:
+            index = faiss.IndexFlatIP(self.dim)
+            index.add(vectors)
+            return index
+        
+        index, saved_ids = self.load()
+        reusable = (index is not None
+                    and isinstance(index, faiss.IndexHNSW)
+                    and saved_ids == ids[:len(saved_ids)])
+        if reusable and len(saved_ids) == len(ids):
+            return index
+        
+        if reusable:
+            # Only new memories since the last save; index just those
+            index.add(vectors[len(saved_ids):])
+        else:
+            index = faiss.index_factory(self.dim, "HNSW32", faiss.METRIC_INNER_PRODUCT)
+            index.add(vectors)
+        
+        try:
+            self.save(index, ids)
+        except Exception as e:
+            # The in-memory index is still correct; it'll be rebuilt next run
+            print(f"Failed to save FAISS index: {e}")
+        return index
+
+_embedding_matrix = None
+
+def get_embedding_matrix():
+    """Get the shared EmbeddingMatrix for the data directory."""
+    global _embedding_matrix
+    if _embedding_matrix is None:
+        ensure_data_directory()
+        _embedding_matrix = EmbeddingMatrix(os.path.join(DATA_DIRECTORY, EMBEDDINGS_FILE))
+    return _embedding_matrix
+
+def _store_embeddings(memories):
+    """
+    Move the memories' inline 'embedding' vectors into the embedding matrix.
+    
+    Each memory keeps 'embedding_row' pointing at its row and 'embedding_dim'
+    with the original vector length, since vectors of different lengths
+    aren't comparable.
+    
+    Args:
+        memories (list): Memory objects, modified in place
+        
+    Returns:
+        list: The memories that had an embedding
+    """
+    with_embeddings = []
+    embeddings = []
+    for memory in memories:
+        embedding = memory.pop('embedding', None)
+        if embedding is not None and len(embedding):
+            with_embeddings.append(memory)
+            embeddings.append(embedding)
+    if not embeddings:
+        return with_embeddings
+    
+    first_row = get_embedding_matrix().extend(embeddings)
+    for offset, (memory, embedding) in enumerate(zip(with_embeddings, embeddings)):
+        memory['embedding_row'] = first_row + offset
+        memory['embedding_dim'] = len(embedding)
+    return with_embeddings
+
+def _intern_categories(memory):
+    """
+    Intern a memory's emotion, location, topic and people strings.
+    
+    The same few values repeat across many memories, so interning makes
+    every copy share one string and turns dict lookups on them into
+    identity checks.
+    
+    Args:
+        memory (dict): The memory object, modified in place
+    """
+    for field in ('emotion', 'location'):
+        value = memory.get(field)
+        if isinstance(value, str):
+            memory[field] = sys.intern(value)
+    for field in ('topics', 'people'):
+        values = memory.get(field)
+        if isinstance(values, list):
+            memory[field] = [sys.intern(value) if isinstance(value, str) else value for value in values]
+
+def _read_log(path):
+    """
+    Replay the memories log into the current list of memories.
+    
+    Later records for the same ID replace earlier ones in place, and
+    tombstones ({'id': ..., '_deleted': True}) remove the memory.
+    
+    Args:
+        path (str): Path to the log file
+        
+    Returns:
+        tuple: (list of memories, number of records in the log)
+    """
+    memories_by_id = {}
+    record_count = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = _decode_record(line)
+            except ValueError:
+                # A torn write from a crash mid-append; skip it
+                continue
+            if 'format_version' in record:
+                continue
+            record_count += 1
+            if record.get('_deleted'):
+                memories_by_id.pop(record.get('id'), None)
+            else:
+                memories_by_id[record.get('id')] = record
+    
+    memories = list(memories_by_id.values())
+    for memory in memories:
+        _intern_categories(memory)
+    return memories, record_count
+
+# Embedding row and dimension of every live memory as written to the log,
+# built on first use, and the file version written by the last compaction.
+# Only the writer thread changes them
+_writer_state = {'rows': None, 'compacted': None}
+
+# Held while compaction renumbers the embedding rows, so readers never pair
+# a log with a matrix from a different compaction
+_matrix_lock = threading.Lock()
+
+def _live_embedding_rows():
+    """
+    Get the writer's map of live memory IDs to their embedding rows.
+    
+    Returns:
+        dict: Memory ID -> (embedding_row, embedding_dim), both None for
+        memories without an embedding
+    """
+    if _writer_state['rows'] is None:
+        path = get_data_file_path()
+        memories = _read_log(path)[0] if os.path.exists(path) else []
+        _writer_state['rows'] = {memory.get('id'): (memory.get('embedding_row'), memory.get('embedding_dim'))
+                                 for memory in memories}
+    return _writer_state['rows']
+
+def _compact_log(memories):
+    """
+    Rewrite the log and embedding matrix so they only hold the live memories.
+    
+    Embedding rows are renumbered in memory order, and any inline embeddings
+    left by older versions are moved into the matrix. Runs on the writer
+    thread, which maps rows in records from sessions to the new numbering.
+    
+    Args:
+        memories (list): The current list of memories, modified in place
+    """
+    matrix = get_embedding_matrix()
+    old_rows = matrix.rows()
+    embeddings = []
+    for memory in memories:
+        embedding = memory.pop('embedding', None)
+        row = memory.pop('embedding_row', None)
+        if embedding is not None and len(embedding):
+            memory['embedding_dim'] = len(embedding)
+        elif row is not None and row < len(old_rows):
+            embedding = old_rows[row]
+        else:
+            memory.pop('embedding_dim', None)
+            continue
+        memory['embedding_row'] = len(embeddings)
+        embeddings.append(embedding)
+    matrix.replace(embeddings)
+    
+    path = get_data_file_path()
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(_log_header())
+        f.write(b"".join(_encode_record(memory) for memory in memories))
+    os.replace(temp_path, path)
+    _writer_state['rows'] = {memory.get('id'): (memory.get('embedding_row'), memory.get('embedding_dim'))
+                             for memory in memories}
+
+def _needs_compaction(memories, record_count):
+    """
+    Check whether the log is worth rewriting.
+    
+    Args:
+        memories (list): The live memories replayed from the log
+        record_count (int): Number of records in the log
+        
+    Returns:
+        bool: True once updates and deletes dominate the log, or when inline
+        embeddings written by older versions need moving into the matrix
+    """
+    return ((record_count >= COMPACTION_MIN_RECORDS
+             and record_count > COMPACTION_RATIO * len(memories))
+            or any('embedding' in memory for memory in memories))
+
+# Set while a compaction is queued, so reruns don't queue another
+_compaction_queued = threading.Event()
+
+def _compact_in_background():
+    """Compact the log if it still needs it; runs on the writer thread."""
+    try:
+        # Replayed here so writes queued before this one are included
+        memories, record_count = _read_log(get_data_file_path())
+        if _needs_compaction(memories, record_count):
+            with _matrix_lock:
+                _compact_log(memories)
+                _refresh_memories_version()
+                _writer_state['compacted'] = get_memories_version()
+                _invalidate_caches()
+    except Exception as e:
+        _report_write_error(f"Failed to compact memories: {e}")
+    finally:
+        _compaction_queued.clear()
+
+def _migrate_legacy_pickle():
+    """
+    Convert a memories.pkl file (format version 1) into the JSONL log.
+    
+    This is the only place pickle is still read; new data is never pickled.
+    """
+    legacy_path = os.path.join(DATA_DIRECTORY, LEGACY_MEMORIES_FILE)
+    if os.path.exists(legacy_path) and not os.path.exists(get_data_file_path()):
+        with open(legacy_path, 'rb') as f:
+            memories = pickle.load(f)
+        # The writer thread owns the matrix rows, so migrate there
+        _save_executor.submit(_compact_log, memories).result()
+        _refresh_memories_version()
+
+# Highest memory ID handed out so far, shared by every session in the process
+_last_id = {'value': None}
+_id_lock = threading.Lock()
+
+def next_memory_id():
+    """
+    Allocate an ID for a new memory.
+    
+    IDs are one more than the highest ID ever stored or handed out, so they
+    stay unique after deletes and across sessions saving at the same time.
+    
+    Returns:
+        int: An ID no other memory uses
+    """
+    with _id_lock:
+        if _last_id['value'] is None:
+            _last_id['value'] = max((m['id'] for m in load_memories() if isinstance(m.get('id'), int)),
+                                    default=0)
+        _last_id['value'] += 1
+        return _last_id['value']
+
 def save_memory(memory):
     """
     Save a new memory to storage.
@@ -24,22 +636,98 @@ def save_memory(memory):
     Args:
         memory (dict): The memory object to save
     """
-    # Load existing memories
-    memories = load_memories()
+    # The session's list is the source of truth; only read disk on a cold start
+    memories = _get_memories()
     
     # Add the new memory
     memories.append(memory)
+    _index_appended(memories, [memory])
     
-    # Update the session state
-    st.session_state.memories = memories
-    
-    # Save to disk
+    # Write in the background; the writer moves the embedding into the matrix,
+    # so the vector doesn't stay in session state
     try:
-        with open(get_data_file_path(), 'wb') as f:
-            pickle.dump(memories, f)
+        _submit_write(_write_records, [dict(memory)])
+        memory.pop('embedding', None)
     except Exception as e:
         st.error(f"Failed to save memory: {e}")
 
+def save_memories_bulk(new_memories):
+    """
+    Save several new memories with one embedding write and one log append.
+    
+    Args:
+        new_memories (list): The memory objects to save
+    """
+    # The session's list is the source of truth; only read disk on a cold start
+    memories = _get_memories()
+    
+    # Add the new memories
+    memories.extend(new_memories)
+    _index_appended(memories, new_memories)
+    
+    # Write in the background; the writer moves the embeddings into the matrix,
+    # so the vectors don't stay in session state
+    _submit_write(_write_records, [dict(memory) for memory in new_memories])
+    for memory in new_memories:
+        memory.pop('embedding', None)
+
+# Version of the memories file as of the last completed write
+_file_version = {'value': None, 'known': False}
+
+def _refresh_memories_version():
+    """Re-read the memories file's version after this process wrote it."""
+    try:
+        stat = os.stat(get_data_file_path())
+        _file_version['value'] = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        _file_version['value'] = None
+    _file_version['known'] = True
+
+def get_memories_version():
+    """
+    Get a token that changes whenever the memories file is written.
+    
+    The version is tracked in memory and refreshed by the writer thread
+    after each write, so reads neither stat the file nor wait for queued
+    writes. A save shows up in cached views once its write has finished;
+    the saving session already has it in its own list.
+    
+    Returns:
+        tuple: (mtime in nanoseconds, size in bytes), or None if there is no file yet
+    """
+    if not _file_version['known']:
+        _refresh_memories_version()
+    return _file_version['value']
+
+def _invalidate_caches():
+    """Drop cached views of the memories file after a write."""
+    _load_memories_cached.clear()
+    _embedding_vectors.clear()
+    _build_faiss_index.clear()
+    _memory_stats.clear()
+    _memories_dataframe.clear()
+    _date_index.clear()
+    _unlock_dates.clear()
+
+@st.cache_data(show_spinner=False)
+def _load_memories_cached(path, version):
+    """
+    Read and replay the memories log.
+    
+    Cached per file version, so reruns that don't change the file skip the
+    disk read and JSON parsing. st.cache_data hands each caller its own
+    copy, so callers are free to mutate the returned list.
+    
+    Args:
+        path (str): Path to the log file
+        version (tuple): Value of get_memories_version() for the file
+        
+    Returns:
+        tuple: (list of memory objects, whether the log should be compacted)
+    """
+    memories, record_count = _read_log(path)
+    return memories, _needs_compaction(memories, record_count)
+
 def load_memories():
     """
     Load all memories from storage.
@@ -48,15 +736,316 @@ def load_memories():
         list: List of memory objects
     """
     try:
-        if os.path.exists(get_data_file_path()):
-            with open(get_data_file_path(), 'rb') as f:
-                return pickle.load(f)
-        else:
+        _migrate_legacy_pickle()
+        version = get_memories_version()
+        if version is None:
             return []
+        memories, needs_compaction = _load_memories_cached(get_data_file_path(), version)
+        # Compact on the writer thread, so it can't interleave with appends
+        if needs_compaction and not _compaction_queued.is_set():
+            _compaction_queued.set()
+            _submit_write(_compact_in_background)
+        return memories
     except Exception as e:
         st.error(f"Failed to load memories: {e}")
         return []
 
+@st.cache_resource(show_spinner=False)
+def _embedding_vectors(path, version, dim):
+    """
+    Gather the stored embeddings of one dimension as a normalized float32 matrix.
+    
+    Args:
+        path (str): Path to the log file
+        version (tuple): Value of get_memories_version() for the file
+        dim (int): Embedding dimension to select
+        
+    Returns:
+        tuple: (list of memory IDs, numpy.ndarray of shape (len(ids), dim))
+    """
+    ids = []
+    rows = []
+    with _matrix_lock:
+        # Replay the log at the version this entry is cached under, not the
+        # current one, so a write landing meanwhile can't be cached under it.
+        # Rows from before the last compaction no longer match the matrix,
+        # so a version older than that is read as the compacted one
+        compacted = _writer_state.get('compacted')
+        if compacted is not None and version[0] < compacted[0]:
+            version = compacted
+        memories, _ = _load_memories_cached(path, version)
+        for memory in memories:
+            if memory.get('embedding_row') is not None and memory.get('embedding_dim') == dim:
+                ids.append(memory.get('id'))
+                rows.append(memory['embedding_row'])
+        
+        # Stored as float16 to halve IO; promote to float32 for BLAS
+        vectors = get_embedding_matrix().rows()[rows, :dim].astype(np.float32)
+    # Normalized vectors make inner product equal to cosine similarity
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return ids, vectors
+
+def get_embedding_vectors(dim=EMBEDDING_DIM):
+    """
+    Get the cached, L2-normalized embeddings of the given dimension.
+    
+    Args:
+        dim (int): Embedding dimension of the query
+        
+    Returns:
+        tuple: (list of memory IDs, numpy.ndarray with one row per ID)
+    """
+    version = get_memories_version()
+    if version is None:
+        return [], np.zeros((0, dim), dtype=np.float32)
+    return _embedding_vectors(get_data_file_path(), version, dim)
+
+@st.cache_resource(show_spinner=False)
+def _build_faiss_index(path, version, dim):
+    """
+    Load the inner-product FAISS index over the stored memory embeddings.
+    
+    Only embeddings with the requested dimension are indexed, since vectors
+    of different sizes can't be compared. Large HNSW indexes are kept on
+    disk by VectorStore, so they are only rebuilt when memories were deleted.
+    
+    Args:
+        path (str): Path to the log file
+        version (tuple): Value of get_memories_version() for the file
+        dim (int): Embedding dimension to index
+        
+    Returns:
+        tuple: (faiss.Index, list of memory IDs in index order)
+    """
+    ids, vectors = _embedding_vectors(path, version, dim)
+    index = VectorStore(os.path.dirname(path), dim).sync(ids, vectors)
+    return index, ids
+
+def get_faiss_index(dim=EMBEDDING_DIM):
+    """
+    Get the cached FAISS index for embeddings of the given dimension.
+    
+    Args:
+        dim (int): Embedding dimension of the query
+        
+    Returns:
+        tuple: (faiss.Index, list of memory IDs in index order), or None if
+        FAISS is not installed or there are no memories yet
+    """
+    if faiss is None:
+        return None
+    version = get_memories_version()
+    if version is None:
+        return None
+    return _build_faiss_index(get_data_file_path(), version, dim)
+
+@st.cache_data(show_spinner=False)
+def _memory_stats(path, version, today):
+    """
+    Compute aggregate statistics over all stored memories in a single pass.
+    
+    Args:
+        path (str): Path to the log file
+        version (tuple): Value of get_memories_version() for the file
+        today (str): Today's date in ISO format, used to count locked capsules
+        
+    Returns:
+        dict: Memory statistics
+    """
+    memories_df = _memories_dataframe(path, version)
+    emotion_counts = Counter(memories_df['emotion'].tolist())
+    
+    # Locked capsules in one vectorized comparison ('' means no unlock date)
+    unlock_dates = _unlock_dates(path, version)
+    locked_count = int(((unlock_dates != '') & (unlock_dates > today)).sum())
+    
+    return {
+        'total': len(memories_df),
+        'most_common_emotion': emotion_counts.most_common(1)[0][0] if emotion_counts else None,
+        'locked_count': locked_count,
+        'emotions': sorted(memories_df['emotion'].unique().tolist()),
+        'people': sorted(memories_df['people'].explode().dropna().unique().tolist())
+    }
+
+def get_memory_stats():
+    """
+    Get cached statistics about the stored memories.
+    
+    Returns:
+        dict: Total count, most common emotion, number of locked time capsules,
+        and sorted lists of the emotions and people seen across all memories
+    """
+    version = get_memories_version()
+    if version is None:
+        return {
+            'total': 0,
+            'most_common_emotion': None,
+            'locked_count': 0,
+            'emotions': [],
+            'people': []
+        }
+    return _memory_stats(get_data_file_path(), version, get_current_date()[:10])
+
+@st.cache_data(show_spinner=False)
+def _memories_dataframe(path, version):
+    """
+    Build a DataFrame of all stored memories, without embeddings.
+    
+    Args:
+        path (str): Path to the log file
+        version (tuple): Value of get_memories_version() for the file
+        
+    Returns:
+        pandas.DataFrame: One row per memory with the columns in DATAFRAME_COLUMNS
+    """
+    rows = [
+        {column: memory.get(column) or default for column, default in DATAFRAME_COLUMNS.items()}
+        for memory in _load_memories_cached(path, version)[0]
+    ]
+    return pd.DataFrame(rows, columns=list(DATAFRAME_COLUMNS))
+
+@st.cache_data(show_spinner=False)
+def _date_index(path, version):
+    """
+    Sort the memories' dates once so date ranges can be found by binary search.
+    
+    Args:
+        path (str): Path to the log file
+        version (tuple): Value of get_memories_version() for the file
+        
+    Returns:
+        tuple: (row positions in date order, the matching YYYY-MM-DD dates)
+    """
+    dates = _memories_dataframe(path, version)['date'].str.slice(0, 10).to_numpy(dtype='U10')
+    order = np.argsort(dates, kind='stable')
+    return order, dates[order]
+
+@st.cache_data(show_spinner=False)
+def _unlock_dates(path, version):
+    """
+    Extract the memories' unlock dates as a NumPy string array.
+    
+    Args:
+        path (str): Path to the log file
+        version (tuple): Value of get_memories_version() for the file
+        
+    Returns:
+        numpy.ndarray: Unlock date per row of the DataFrame, '' if there is none
+    """
+    return _memories_dataframe(path, version)['unlock_date'].fillna('').to_numpy(dtype=str)
+
+def get_unlocked_mask(current_date, version=None):
+    """
+    Find which memories are readable today, i.e. not still-locked time capsules.
+    
+    Args:
+        current_date (str): Today's date in ISO format
+        version (tuple): get_memories_version() value to read at, so several
+            calls in one render see the same memories; defaults to the current one
+        
+    Returns:
+        numpy.ndarray: Boolean mask aligned with the rows of load_memories_df()
+    """
+    if version is None:
+        version = get_memories_version()
+    if version is None:
+        return np.zeros(0, dtype=bool)
+    # '' sorts before every date, so memories without an unlock date pass
+    return _unlock_dates(get_data_file_path(), version) <= current_date
+
+def get_date_range_positions(start_date, end_date=None, version=None):
+    """
+    Find the memories dated within a range, in O(log N) per bound.
+    
+    Args:
+        start_date (str): First date to include, as YYYY-MM-DD
+        end_date (str): Last date to include, as YYYY-MM-DD, or None for no upper bound
+        version (tuple): get_memories_version() value to read at, so several
+            calls in one render see the same memories; defaults to the current one
+        
+    Returns:
+        numpy.ndarray: Sorted row positions into load_memories_df()
+    """
+    if version is None:
+        version = get_memories_version()
+    if version is None:
+        return np.zeros(0, dtype=np.intp)
+    order, sorted_dates = _date_index(get_data_file_path(), version)
+    start = np.searchsorted(sorted_dates, start_date, side='left')
+    end = len(sorted_dates) if end_date is None else np.searchsorted(sorted_dates, end_date, side='right')
+    return np.sort(order[start:end])
+
+def load_memories_df(version=None):
+    """
+    Get all memories as a cached DataFrame for vectorized filtering.
+    
+    Missing fields are filled from DATAFRAME_COLUMNS, so for example memories
+    without an unlock date have an empty string in 'unlock_date'.
+    
+    Args:
+        version (tuple): get_memories_version() value to read at, so several
+            calls in one render see the same memories; defaults to the current one
+        
+    Returns:
+        pandas.DataFrame: One row per memory, in storage order
+    """
+    if version is None:
+        version = get_memories_version()
+    if version is None:
+        return pd.DataFrame(columns=list(DATAFRAME_COLUMNS))
+    return _memories_dataframe(get_data_file_path(), version)
+
+def _get_memories():
+    """
+    Get the in-process list of memories, loading it on a cold start.
+    
+    Returns:
+        list: The session's list of memory objects
+    """
+    memories = st.session_state.get('memories')
+    if not memories:
+        memories = load_memories()
+        st.session_state.memories = memories
+    return memories
+
+# Position of each memory ID in the last list indexed, so lookups don't scan
+_STATE = {'memories': None, 'length': 0, 'id_index': {}}
+
+def _get_id_index(memories):
+    """
+    Get the ID -> position index for a list of memories.
+    
+    The index is rebuilt only when a different list is passed in or the
+    list has changed length since it was built.
+    
+    Args:
+        memories (list): List of memory objects
+        
+    Returns:
+        dict: Mapping of memory ID to its position in the list
+    """
+    if _STATE['memories'] is not memories or _STATE['length'] != len(memories):
+        _STATE['memories'] = memories
+        _STATE['length'] = len(memories)
+        _STATE['id_index'] = {memory.get('id'): i for i, memory in enumerate(memories)}
+    return _STATE['id_index']
+
+def _index_appended(memories, new_memories):
+    """
+    Add memories just appended to a list to that list's ID index, if it has one.
+    
+    Args:
+        memories (list): The list the memories were appended to
+        new_memories (list): The appended memories
+    """
+    if _STATE['memories'] is memories and _STATE['length'] == len(memories) - len(new_memories):
+        for memory in new_memories:
+            _STATE['id_index'][memory.get('id')] = _STATE['length']
+            _STATE['length'] += 1
+    else:
+        _STATE['memories'] = None
+
 def get_memory_by_id(memory_id):
     """
     Get a specific memory by its ID.
@@ -67,11 +1056,9 @@ def get_memory_by_id(memory_id):
     Returns:
         dict: The memory object if found, None otherwise
     """
-    memories = load_memories()
-    for memory in memories:
-        if memory.get('id') == memory_id:
-            return memory
-    return None
+    memories = _get_memories()
+    i = _get_id_index(memories).get(memory_id)
+    return memories[i] if i is not None else None
 
 def update_memory(memory_id, updated_data):
     """
@@ -84,22 +1071,18 @@ def update_memory(memory_id, updated_data):
     Returns:
         bool: True if successful, False otherwise
     """
-    memories = load_memories()
-    for i, memory in enumerate(memories):
-        if memory.get('id') == memory_id:
-            # Update the memory with new data
-            memories[i].update(updated_data)
-            
-            # Save changes
-            with open(get_data_file_path(), 'wb') as f:
-                pickle.dump(memories, f)
-            
-            # Update session state
-            st.session_state.memories = memories
-            
-            return True
+    memories = _get_memories()
+    i = _get_id_index(memories).get(memory_id)
+    if i is None:
+        return False
+    
+    # Update the memory with new data
+    memories[i].update(updated_data)
+    
+    # Append the updated record; it supersedes the old one on load
+    _submit_write(_write_records, [dict(memories[i])])
     
-    return False
+    return True
 
 def update_memory_unlock_date(memory_id, new_unlock_date):
     """
@@ -114,6 +1097,135 @@ def update_memory_unlock_date(memory_id, new_unlock_date):
     """
     return update_memory(memory_id, {'unlock_date': new_unlock_date})
 
+def _apply_analysis(memory, processed):
+    """
+    Merge the AI analysis of a pending memory into it.
+    
+    Args:
+        memory (dict): The memory object, modified in place
+        processed (dict): Result of process_memory for the memory's text
+    """
+    memory['topics'] = processed.get('topics', [])
+    memory['context'] = processed.get('context', '')
+    # A time capsule keeps the feeling its author picked
+    if not memory.get('is_time_capsule'):
+        memory['emotion'] = processed.get('emotion', 'Neutral')
+    memory.pop('pending_ai', None)
+
+# IDs of memories queued or running on the enrichment workers, so sessions
+# starting meanwhile don't queue them again
+_enriching_ids = set()
+_enriching_lock = threading.Lock()
+
+def _claim_for_enrichment(memories):
+    """
+    Mark memories as being enriched.
+    
+    Args:
+        memories (list): Memory objects to enrich
+        
+    Returns:
+        list: The memories that weren't already queued or running
+    """
+    with _enriching_lock:
+        claimed = [memory for memory in memories if memory.get('id') not in _enriching_ids]
+        _enriching_ids.update(memory.get('id') for memory in claimed)
+    return claimed
+
+def enrich_in_background(memory):
+    """
+    Queue the AI analysis and embedding of a memory saved with 'pending_ai'.
+    
+    The memory is updated in place once the API calls finish and its new
+    record is queued, so saving doesn't wait on them.
+    
+    Args:
+        memory (dict): The saved memory object
+    """
+    if _claim_for_enrichment([memory]):
+        _enrichment_executor.submit(_enrich_memory, memory)
+
+def _enrich_memory(memory, embedding=None):
+    """
+    Analyze and embed a pending memory; runs on an enrichment worker.
+    
+    Args:
+        memory (dict): The saved memory object, updated in place when done
+        embedding (list): Embedding already generated for the memory, or
+            None to generate it here
+    """
+    # Imported here because memory_processor_cache imports this module
+    from memory_processor_cache import analyze_and_embed, analyze_memory
+    
+    try:
+        if embedding is None:
+            processed, embedding = analyze_and_embed(memory.get('text', ''))
+        else:
+            processed = analyze_memory(memory.get('text', ''))
+        
+        # Build the enriched record on a copy that only the writer reads from
+        # once queued; the session's dict is updated once, below
+        enriched = dict(memory)
+        _apply_analysis(enriched, processed)
+        session_update = dict(enriched)
+        enriched['embedding'] = embedding
+        
+        # Append the enriched record; it supersedes the pending one on load,
+        # unless the memory was deleted while it was being analyzed
+        _submit_write(_write_records, [enriched], True)
+        memory.update(session_update)
+        memory.pop('pending_ai', None)
+    except Exception as e:
+        # There's no Streamlit context on this thread, so just log it
+        print(f"Failed to analyze memory: {e}")
+    finally:
+        with _enriching_lock:
+            _enriching_ids.discard(memory.get('id'))
+
+def _enrich_pending(memories):
+    """
+    Embed pending memories in one batch, then analyze each on the workers.
+    
+    Runs on an enrichment worker.
+    
+    Args:
+        memories (list): Memory objects claimed for enrichment
+    """
+    try:
+        embeddings = batch_generate_memory_embeddings([m.get('text', '') for m in memories])
+    except Exception as e:
+        # Each memory then generates its own embedding
+        print(f"Failed to embed memories: {e}")
+        embeddings = [None] * len(memories)
+    for memory, embedding in zip(memories, embeddings):
+        _enrichment_executor.submit(_enrich_memory, memory, embedding)
+
+def hydrate_pending(memories):
+    """
+    Queue the deferred AI processing of memories still marked 'pending_ai'.
+    
+    Time capsules locked far into the future are saved pending and analyzed
+    once unlocked; other memories are pending only if the app stopped
+    before their background analysis finished. All of them get their
+    embeddings in a single batch call, and everything runs on the
+    enrichment workers, so the page doesn't wait for the API. Memories
+    another session already queued are skipped.
+    
+    Args:
+        memories (list): The session's list of memory objects, updated in
+            place as each one finishes
+        
+    Returns:
+        int: Number of memories queued
+    """
+    current_date = get_current_date()
+    pending = _claim_for_enrichment(
+        [m for m in memories
+         if m.get('pending_ai') and (not m.get('unlock_date') or m.get('unlock_date') <= current_date)])
+    if pending:
+        _enrichment_executor.submit(_enrich_pending, pending)
+    return len(pending)
+
 def delete_memory(memory_id):
     """
     Delete a memory by its ID.
@@ -124,22 +1236,19 @@ def delete_memory(memory_id):
     Returns:
         bool: True if successful, False otherwise
     """
-    memories = load_memories()
-    for i, memory in enumerate(memories):
-        if memory.get('id') == memory_id:
-            # Remove the memory
-            del memories[i]
-            
-            # Save changes
-            with open(get_data_file_path(), 'wb') as f:
-                pickle.dump(memories, f)
-            
-            # Update session state
-            st.session_state.memories = memories
-            
-            return True
+    memories = _get_memories()
+    i = _get_id_index(memories).get(memory_id)
+    if i is None:
+        return False
+    
+    # Remove the memory; positions after it shift, so rebuild the index on next use
+    del memories[i]
+    _STATE['memories'] = None
+    
+    # Append a tombstone so the memory is dropped on load
+    _submit_write(_write_records, [{'id': memory_id, '_deleted': True}])
     
-    return False
+    return True
 
 def export_memories_json():
     """
@@ -157,6 +1266,9 @@ def export_memories_json():
         # Remove embedding vectors as they're not easily serializable
         if 'embedding' in mem_copy:
             del mem_copy['embedding']
+        # Matrix rows only mean something inside this data directory
+        mem_copy.pop('embedding_row', None)
+        mem_copy.pop('embedding_dim', None)
         serializable_memories.append(mem_copy)
     
     return json.dumps(serializable_memories, indent=2)
@@ -174,27 +1286,24 @@ def import_memories_json(json_str):
     try:
         imported_memories = json.loads(json_str)
         
-        # Get existing memories
-        current_memories = load_memories()
-        
-        # Generate new IDs for imported memories to avoid conflicts
-        next_id = max([m.get('id', 0) for m in current_memories], default=0) + 1
-        
         # Process each imported memory
         for memory in imported_memories:
-            # Assign new ID
-            memory['id'] = next_id
-            next_id += 1
+            # Assign a new ID to avoid conflicts
+            memory['id'] = next_memory_id()
             
-            # Add to existing memories
-            current_memories.append(memory)
+            # Drop row pointers from another store; keep any inline embedding
+            memory.pop('embedding_row', None)
+            memory.pop('embedding_dim', None)
         
-        # Save combined memories
-        with open(get_data_file_path(), 'wb') as f:
-            pickle.dump(current_memories, f)
+        # Embed everything that arrived without an embedding in one request
+        missing = [m for m in imported_memories if not m.get('embedding') and m.get('text')]
+        if missing:
+            embeddings = batch_generate_memory_embeddings([m['text'] for m in missing])
+            for memory, embedding in zip(missing, embeddings):
+                memory['embedding'] = embedding
         
-        # Update session state
-        st.session_state.memories = current_memories
+        # Save all imported memories in a single pass
+        save_memories_bulk(imported_memories)
         
         return True
     except Exception as e:
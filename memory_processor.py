@@ -1,37 +1,213 @@
 import os
-from openai import OpenAI
+from openai import OpenAI, APIConnectionError, InternalServerError, RateLimitError
+from pydantic import BaseModel
 import json
+import functools
+import time
+import heapq
+import zlib
+import threading
+from collections import Counter, OrderedDict
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# pyahocorasick is optional; without it keywords are found with substring checks
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Numba is optional; without it the fallback search uses a NumPy product
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
 
 # Initialize OpenAI client with error handling
 # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
 # do not change this unless explicitly requested by the user
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 
-# Flag to track if OpenAI is available
-openai_available = False
-client = None
+@functools.cache
+def get_client():
+    """
+    Get the shared OpenAI client, created on first use.
+    
+    Returns:
+        OpenAI: The client, or None without an API key (callers then fail
+        their API call and use the fallback methods)
+    """
+    return OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+
+# Attempts for API calls made in the background, with exponential backoff
+API_RETRIES = 3
+API_RETRY_DELAY = 1.0  # seconds before the first retry, doubled after each
 
-try:
-    if OPENAI_API_KEY:
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        # Test with a simple request to verify the API key works
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": "Hello"}],
-            max_tokens=5
-        )
-        openai_available = True
+def call_with_retries(function, *args):
+    """
+    Call an API function, retrying transient errors with exponential backoff.
+    
+    Connection errors, rate limits and server errors are retried; anything
+    else, or the last transient error, is raised.
+    
+    Args:
+        function (callable): Function making the API call
+        *args: Arguments for the function
+        
+    Returns:
+        The function's return value
+    """
+    for attempt in range(API_RETRIES):
+        try:
+            return function(*args)
+        except (APIConnectionError, RateLimitError, InternalServerError) as e:
+            if attempt == API_RETRIES - 1:
+                raise
+            print(f"Transient API error, retrying: {e}")
+            time.sleep(API_RETRY_DELAY * 2 ** attempt)
+
+def _check_openai_available():
+    """
+    Verify the API key works by listing the models, which isn't billed.
+    
+    Returns:
+        bool: True if the request succeeded
+    """
+    try:
+        get_client().models.list()
         print("OpenAI API connection successful!")
-except Exception as e:
-    print(f"OpenAI initialization error: {e}")
-    # If there's an insufficient_quota error, that means the key is valid but has no credits
-    if "insufficient_quota" in str(e):
-        print("API key is valid but has insufficient quota. Using fallback methods.")
-    # We'll use fallback methods when OpenAI is not available
+        return True
+    except Exception as e:
+        print(f"OpenAI initialization error: {e}")
+        # We'll use fallback methods when OpenAI is not available
+        return False
 
-def process_memory(text):
+# The key check starts on the first is_openai_available() call and runs in
+# the background, so neither importing this module nor the page waits on it
+_availability = {'check': None}
+_availability_lock = threading.Lock()
+
+def is_openai_available():
     """
-    Process a new memory using OpenAI to extract context, emotion, topics, etc.
+    Report whether the OpenAI API is usable, without blocking.
+    
+    Returns:
+        bool: False without a key or if the key check failed; True once it
+        succeeded, and while it is still running
+    """
+    if not OPENAI_API_KEY:
+        return False
+    with _availability_lock:
+        if _availability['check'] is None:
+            _availability['check'] = _recall_executor.submit(_check_openai_available)
+    check = _availability['check']
+    if not check.done():
+        return True
+    return check.result()
+
+# Keyword tables for the offline analysis, matched as substrings of the lowercased text
+BASIC_EMOTION_KEYWORDS = {
+    'Happy': ['happy', 'joy', 'excited', 'glad', 'delighted', 'pleased'],
+    'Sad': ['sad', 'unhappy', 'depressed', 'down', 'blue', 'upset'],
+    'Angry': ['angry', 'mad', 'furious', 'annoyed', 'irritated'],
+    'Anxious': ['anxious', 'worried', 'nervous', 'stressed'],
+    'Peaceful': ['peaceful', 'calm', 'relaxed', 'tranquil'],
+    'Nostalgic': ['nostalgic', 'remember', 'memory', 'past', 'childhood'],
+    'Grateful': ['grateful', 'thankful', 'appreciate']
+}
+
+EMOTION_KEYWORDS = {
+    'Happy': ['happy', 'joy', 'delighted', 'pleased', 'cheerful', 'content', 'joy'],
+    'Sad': ['sad', 'unhappy', 'depressed', 'down', 'blue', 'upset', 'gloomy'],
+    'Angry': ['angry', 'mad', 'furious', 'annoyed', 'irritated', 'frustrated'],
+    'Surprised': ['surprised', 'shocked', 'astonished', 'amazed', 'stunned'],
+    'Anxious': ['anxious', 'worried', 'nervous', 'stressed', 'uneasy', 'concerned'],
+    'Peaceful': ['peaceful', 'calm', 'relaxed', 'tranquil', 'serene', 'content'],
+    'Nostalgic': ['nostalgic', 'remember', 'memory', 'past', 'childhood', 'reminisce'],
+    'Excited': ['excited', 'thrilled', 'eager', 'enthusiastic', 'energetic'],
+    'Grateful': ['grateful', 'thankful', 'appreciate', 'blessed', 'fortunate'],
+    'Confused': ['confused', 'puzzled', 'perplexed', 'bewildered', 'uncertain'],
+    'Proud': ['proud', 'accomplished', 'achievement', 'satisfied'],
+    'Embarrassed': ['embarrassed', 'ashamed', 'humiliated', 'mortified'],
+    'Hopeful': ['hopeful', 'optimistic', 'looking forward', 'anticipate'],
+    'Neutral': []  # Default if no other emotion is detected
+}
+
+COMMON_TOPICS = [
+    'family', 'work', 'school', 'friends', 'travel', 'food', 'health', 
+    'hobby', 'achievement', 'challenge', 'celebration', 'learning'
+]
+
+def _keyword_automaton(keywords):
+    """
+    Build an Aho-Corasick automaton that finds all keywords in one pass.
+    
+    Args:
+        keywords (iterable): Keywords to search for
+        
+    Returns:
+        ahocorasick.Automaton: The automaton, or None without pyahocorasick
+    """
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+def _find_keywords(text_lower, keywords, automaton):
+    """
+    Find which keywords occur in a lowercased text.
+    
+    Args:
+        text_lower (str): Lowercased text to search
+        keywords (iterable): Keywords to search for
+        automaton (ahocorasick.Automaton): Automaton built from the keywords, or None
+        
+    Returns:
+        set: The keywords that occur in the text
+    """
+    if automaton is not None:
+        return {keyword for _, keyword in automaton.iter(text_lower)}
+    return {keyword for keyword in keywords if keyword in text_lower}
+
+def _dominant_emotion(text, emotion_keywords, automaton):
+    """
+    Pick the emotion with the most keywords present in a text.
+    
+    Args:
+        text (str): The memory text
+        emotion_keywords (dict): Emotion -> keywords table
+        automaton (ahocorasick.Automaton): Automaton built from the table, or None
+        
+    Returns:
+        str: The dominant emotion, or 'Neutral' if no keyword occurs
+    """
+    all_keywords = (keyword for keywords in emotion_keywords.values() for keyword in keywords)
+    found = _find_keywords(text.lower(), all_keywords, automaton)
+    
+    # Count emotion keyword occurrences
+    emotion_scores = {
+        emotion: sum(1 for keyword in keywords if keyword in found)
+        for emotion, keywords in emotion_keywords.items()
+    }
+    
+    # Get the dominant emotion or default to Neutral
+    if any(emotion_scores.values()):
+        return max(emotion_scores.items(), key=lambda x: x[1])[0]
+    return 'Neutral'
+
+_BASIC_EMOTION_AUTOMATON = _keyword_automaton(
+    {keyword for keywords in BASIC_EMOTION_KEYWORDS.values() for keyword in keywords})
+_EMOTION_AUTOMATON = _keyword_automaton(
+    {keyword for keywords in EMOTION_KEYWORDS.values() for keyword in keywords})
+_TOPIC_AUTOMATON = _keyword_automaton(COMMON_TOPICS)
+
+def basic_memory_analysis(text):
+    """
+    Analyze a memory with simple keyword heuristics, without calling the API.
     
     Args:
         text (str): The memory text to process
@@ -41,102 +217,163 @@ def process_memory(text):
     """
     # Simple text analysis without API for basic emotion detection
     def basic_emotion_analysis(txt):
-        txt = txt.lower()
-        emotions = {
-            'Happy': ['happy', 'joy', 'excited', 'glad', 'delighted', 'pleased'],
-            'Sad': ['sad', 'unhappy', 'depressed', 'down', 'blue', 'upset'],
-            'Angry': ['angry', 'mad', 'furious', 'annoyed', 'irritated'],
-            'Anxious': ['anxious', 'worried', 'nervous', 'stressed'],
-            'Peaceful': ['peaceful', 'calm', 'relaxed', 'tranquil'],
-            'Nostalgic': ['nostalgic', 'remember', 'memory', 'past', 'childhood'],
-            'Grateful': ['grateful', 'thankful', 'appreciate']
-        }
-        
-        # Count emotion word occurrences
-        emotion_scores = {emotion: 0 for emotion in emotions}
-        for emotion, keywords in emotions.items():
-            for keyword in keywords:
-                if keyword in txt:
-                    emotion_scores[emotion] += 1
-        
-        # Get the dominant emotion or default to Neutral
-        if any(emotion_scores.values()):
-            dominant_emotion = max(emotion_scores.items(), key=lambda x: x[1])[0]
-            return dominant_emotion
-        return 'Neutral'
+        return _dominant_emotion(txt, BASIC_EMOTION_KEYWORDS, _BASIC_EMOTION_AUTOMATON)
     
     # Basic topic extraction without API
     def basic_topic_extraction(txt):
-        common_topics = [
-            'family', 'work', 'school', 'friends', 'travel', 'food', 'health', 
-            'hobby', 'achievement', 'challenge', 'celebration', 'learning'
-        ]
-        
-        found_topics = []
-        txt_lower = txt.lower()
-        for topic in common_topics:
-            if topic in txt_lower:
-                found_topics.append(topic.capitalize())
+        found = _find_keywords(txt.lower(), COMMON_TOPICS, _TOPIC_AUTOMATON)
+        found_topics = [topic.capitalize() for topic in COMMON_TOPICS if topic in found]
         
         return found_topics[:3]  # Limit to top 3 topics
     
-    # Try to use the API first
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert at analyzing personal memories and extracting relevant information. "
-                    "Given a personal memory text, identify the emotional tone, key topics, people mentioned, "
-                    "potential locations, and provide broader context to the memory. "
-                    "Respond with a JSON object."
-                },
-                {"role": "user", "content": text}
-            ],
-            response_format={"type": "json_object"},
-        )
-        
-        # Parse the JSON response
-        result = json.loads(response.choices[0].message.content)
-        
-        # Ensure we have the expected fields
-        processed_memory = {
-            'emotion': result.get('emotion', 'Neutral'),
-            'topics': result.get('topics', []),
-            'context': result.get('context', ''),
-            'people_mentioned': result.get('people_mentioned', []),
-            'location': result.get('location', 'Unknown')
-        }
+    emotion = basic_emotion_analysis(text)
+    topics = basic_topic_extraction(text)
+    
+    # Look for location mentions
+    location_keywords = ['at', 'in', 'near', 'by']
+    location = 'Unknown'
+    for keyword in location_keywords:
+        if f" {keyword} " in f" {text} ":
+            parts = text.split(f" {keyword} ")
+            if len(parts) > 1:
+                possible_location = parts[1].split('.')[0].split(',')[0]
+                if len(possible_location) < 30:  # Reasonable location name length
+                    location = possible_location
+                    break
+    
+    # Return processed memory with basic analysis
+    return {
+        'emotion': emotion,
+        'topics': topics,
+        'context': f"This memory appears to be about {', '.join(topics)}" if topics else "",
+        'people_mentioned': [],
+        'location': location
+    }
+
+def process_memory_with_api(text):
+    """
+    Analyze a memory with OpenAI. Raises if the API call fails.
+    
+    Args:
+        text (str): The memory text to process
         
-        return processed_memory
+    Returns:
+        dict: Processed memory with contextual information
+    """
+    response = get_client().chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {
+                "role": "system",
+                "content": "You are an expert at analyzing personal memories and extracting relevant information. "
+                "Given a personal memory text, identify the emotional tone, key topics, people mentioned, "
+                "potential locations, and provide broader context to the memory. "
+                "Respond with a JSON object."
+            },
+            {"role": "user", "content": text}
+        ],
+        response_format={"type": "json_object"},
+    )
+    
+    # Parse the JSON response
+    result = json.loads(response.choices[0].message.content)
     
+    # Ensure we have the expected fields
+    return {
+        'emotion': result.get('emotion', 'Neutral'),
+        'topics': result.get('topics', []),
+        'context': result.get('context', ''),
+        'people_mentioned': result.get('people_mentioned', []),
+        'location': result.get('location', 'Unknown')
+    }
+
+def process_memory(text):
+    """
+    Process a new memory using OpenAI to extract context, emotion, topics, etc.
+    
+    Args:
+        text (str): The memory text to process
+        
+    Returns:
+        dict: Processed memory with contextual information
+    """
+    # Try to use the API first
+    try:
+        return process_memory_with_api(text)
     except Exception as e:
         print(f"Error processing memory: {e}")
         # Use fallback basic analysis
-        emotion = basic_emotion_analysis(text)
-        topics = basic_topic_extraction(text)
-        
-        # Look for location mentions
-        location_keywords = ['at', 'in', 'near', 'by']
-        location = 'Unknown'
-        for keyword in location_keywords:
-            if f" {keyword} " in f" {text} ":
-                parts = text.split(f" {keyword} ")
-                if len(parts) > 1:
-                    possible_location = parts[1].split('.')[0].split(',')[0]
-                    if len(possible_location) < 30:  # Reasonable location name length
-                        location = possible_location
-                        break
-        
-        # Return processed memory with basic analysis
-        return {
-            'emotion': emotion,
-            'topics': topics,
-            'context': f"This memory appears to be about {', '.join(topics)}" if topics else "",
-            'people_mentioned': [],
-            'location': location
-        }
+        return basic_memory_analysis(text)
+
+# Width of every API embedding (text-embedding-ada-002's size)
+EMBED_DIM = 1536
+
+# Buckets of the hashed bag-of-words embedding used when the API is
+# unavailable. It is kept at this width rather than padded to EMBED_DIM, so
+# search only ever compares it with other fallback embeddings
+FALLBACK_EMBEDDING_DIM = 256
+
+def fit_embedding(embedding):
+    """
+    Copy an API embedding into a float32 vector of exactly EMBED_DIM values.
+    
+    Shorter vectors are zero-padded and longer ones truncated, so every
+    API embedding and query has the same shape.
+    
+    Args:
+        embedding (list): Vector embedding of any length
+        
+    Returns:
+        numpy.ndarray: (EMBED_DIM,) float32 vector
+    """
+    values = np.asarray(embedding, dtype=np.float32)[:EMBED_DIM]
+    vector = np.zeros(EMBED_DIM, dtype=np.float32)
+    vector[:len(values)] = values
+    return vector
+
+def fallback_embedding(text, dim=FALLBACK_EMBEDDING_DIM):
+    """
+    Generate a hashed bag-of-words pseudo-embedding without calling the API.
+    
+    Each word is hashed into one of dim buckets, so texts sharing words get
+    a positive cosine similarity. This is not as effective as real
+    embeddings but provides something to work with.
+    
+    Args:
+        text (str): The memory text to embed
+        dim (int): Number of hash buckets
+        
+    Returns:
+        numpy.ndarray: L2-normalized (dim,) pseudo-embedding of the text
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in text.lower().split():
+        # crc32 is fast and, unlike hash(), stable across processes
+        vector[zlib.crc32(word.encode()) % dim] += 1.0
+    
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+# Texts per embeddings request; the API accepts up to 2048 inputs
+EMBEDDING_BATCH_SIZE = 256
+
+def generate_embedding_with_api(text):
+    """
+    Embed text with OpenAI. Raises if the API call fails.
+    
+    Args:
+        text (str): The memory text to embed
+        
+    Returns:
+        list: Vector embedding of the memory text
+    """
+    response = get_client().embeddings.create(
+        model="text-embedding-ada-002",
+        input=text
+    )
+    return response.data[0].embedding
 
 def generate_memory_embedding(text):
     """
@@ -146,43 +383,291 @@ def generate_memory_embedding(text):
         text (str): The memory text to embed
         
     Returns:
-        list: Vector embedding of the memory text
+        numpy.ndarray: (EMBED_DIM,) vector embedding of the memory text, or a
+        (FALLBACK_EMBEDDING_DIM,) pseudo-embedding if the API is unavailable
     """
     try:
-        response = client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text
-        )
-        return response.data[0].embedding
-    
+        return fit_embedding(generate_embedding_with_api(text))
     except Exception as e:
         print(f"Error generating embedding: {e}")
-        # Generate a simple hash-based pseudo-embedding as fallback
-        # This is not as effective as real embeddings but provides something to work with
-        import hashlib
-        
-        # Create a simple pseudo-embedding based on text characteristics
-        words = text.lower().split()
-        # Use a hash to generate a stable but unique number for each word
-        word_hashes = [int(hashlib.md5(word.encode()).hexdigest(), 16) for word in words if word]
-        
-        # Create a very basic 10-dimensional embedding from the hash values
-        if word_hashes:
-            pseudo_embedding = []
-            for i in range(10):  # 10-dimensional pseudo-embedding
-                # Use different slices of the hash values for each dimension
-                values = [h % (100 + i * 10) for h in word_hashes]
-                # Average the values and normalize to range [-1, 1]
-                pseudo_embedding.append((sum(values) / len(values) / 100) * 2 - 1)
+        return fallback_embedding(text)
+
+def batch_generate_memory_embeddings(texts, batch_size=EMBEDDING_BATCH_SIZE):
+    """
+    Generate embeddings for several texts with one API request per batch.
+    
+    Args:
+        texts (list): The memory texts to embed
+        batch_size (int): Maximum number of texts sent in a single request
+        
+    Returns:
+        list: One vector embedding per text, in the same order; see
+        generate_memory_embedding() for their sizes
+    """
+    embeddings = []
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start:start + batch_size]
+        try:
+            response = get_client().embeddings.create(
+                model="text-embedding-ada-002",
+                input=chunk
+            )
+            # The API tags each result with the position of its input
+            embeddings.extend(fit_embedding(item.embedding) for item in sorted(response.data, key=lambda item: item.index))
+        
+        except Exception as e:
+            # Only this batch falls back; the others keep their API embeddings
+            print(f"Error generating embeddings: {e}")
+            embeddings.extend(fallback_embedding(text) for text in chunk)
+    return embeddings
+
+# Number of best semantic matches kept per query; the rest score 0
+SEMANTIC_TOP_K = 1000
+
+# Use the Numba kernels only for matrices with more rows than this
+NUMBA_MIN_ROWS = 1000
+
+# Semantic cache of recent recall results, so repeated or near-identical
+# queries skip the gpt-4o calls
+QUERY_CACHE_SIZE = 128
+QUERY_CACHE_TTL = 300  # seconds
+QUERY_CACHE_SIMILARITY = 0.95
+# Query text -> (normalized embedding, memories version, ranked IDs, time stored)
+_query_cache = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+if njit is not None:
+    @njit(parallel=True, cache=True, fastmath=True)
+    def _cosine_scores_numba(vectors, query):
+        """
+        Dot each row of a normalized matrix with a normalized query, in parallel.
+        
+        Args:
+            vectors (np.ndarray): (N, dim) float32 matrix of unit vectors
+            query (np.ndarray): (dim,) float32 unit vector
             
-            # Pad to length 10
-            while len(pseudo_embedding) < 10:
-                pseudo_embedding.append(0.0)
-                
-            return pseudo_embedding
+        Returns:
+            np.ndarray: (N,) cosine similarities
+        """
+        n, dim = vectors.shape
+        scores = np.empty(n, dtype=np.float32)
+        for i in prange(n):
+            total = np.float32(0.0)
+            for j in range(dim):
+                total += vectors[i, j] * query[j]
+            scores[i] = total
+        return scores
+    
+    @njit(cache=True)
+    def _topk_cosine_numba(vectors, query, k):
+        """
+        Find the k rows most similar to a query with a bounded min-heap.
+        
+        Args:
+            vectors (np.ndarray): (N, dim) float32 matrix of unit vectors
+            query (np.ndarray): (dim,) float32 unit vector
+            k (int): Number of rows to keep, at least 1
             
-        # If no words, return zeros
-        return [0.0] * 10
+        Returns:
+            tuple: (row indices, their cosine similarities), in no particular order
+        """
+        scores = _cosine_scores_numba(vectors, query)
+        heap = [(scores[0], 0)]
+        for i in range(1, len(scores)):
+            if len(heap) < k:
+                heapq.heappush(heap, (scores[i], i))
+            elif scores[i] > heap[0][0]:
+                heapq.heapreplace(heap, (scores[i], i))
+        rows = np.empty(len(heap), dtype=np.int64)
+        for position in range(len(heap)):
+            rows[position] = heap[position][1]
+        return rows, scores[rows]
+else:
+    _cosine_scores_numba = None
+    _topk_cosine_numba = None
+
+def semantic_search(query_embedding, top_k=SEMANTIC_TOP_K):
+    """
+    Score the stored memories against a query embedding.
+    
+    Only memories embedded the same way as the query (same dimension) are
+    scored, using the FAISS index when available, otherwise a Numba kernel
+    (or a NumPy matrix-vector product) over the stored embedding matrix.
+    
+    Args:
+        query_embedding (list): Vector embedding of the query
+        top_k (int): Keep only this many best matches, or None for all
+        
+    Returns:
+        dict: Mapping of memory ID to cosine similarity for the best matches
+    """
+    # Imported here because data_store pulls in Streamlit
+    from data_store import get_faiss_index, get_embedding_vectors, HNSW_THRESHOLD
+    
+    dim = len(query_embedding)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    norm = np.linalg.norm(query)
+    if norm > 0:
+        query = query / norm
+    
+    found = get_faiss_index(dim)
+    if found is not None:
+        index, ids = found
+        if index.ntotal == 0:
+            return {}
+        # Exact indexes are cheap to search exhaustively; cap k for HNSW
+        k = index.ntotal if index.ntotal <= HNSW_THRESHOLD else SEMANTIC_TOP_K
+        if top_k is not None:
+            k = min(k, top_k)
+        scores, positions = index.search(query[None, :], k)
+        return {ids[pos]: float(score) for score, pos in zip(scores[0], positions[0]) if pos >= 0}
+    
+    ids, vectors = get_embedding_vectors(dim)
+    # Below NUMBA_MIN_ROWS the JIT's dispatch overhead outweighs its speedup
+    use_numba = _cosine_scores_numba is not None and len(ids) > NUMBA_MIN_ROWS
+    if use_numba and top_k is not None and top_k < len(ids):
+        rows, scores = _topk_cosine_numba(np.ascontiguousarray(vectors), query, max(top_k, 1))
+        return {ids[i]: score for i, score in zip(rows.tolist(), scores.tolist())}
+    if use_numba:
+        scores = _cosine_scores_numba(np.ascontiguousarray(vectors), query)
+    else:
+        scores = vectors @ query
+    
+    if top_k is not None and top_k < len(scores):
+        # Select the best matches in O(N) instead of sorting every score
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        return {ids[i]: score for i, score in zip(best.tolist(), scores[best].tolist())}
+    return dict(zip(ids, scores.tolist()))
+
+class Ranking(BaseModel):
+    """Structured output of the final recall ranking."""
+    memory_ids: list[int]
+
+# Most memories returned by a recall query
+RECALL_RESULT_LIMIT = 50
+
+# Texts whose API emotion analysis is kept in memory
+EMOTION_CACHE_SIZE = 4096
+
+# Characters of each memory's text sent for the final ranking
+RANKING_TEXT_CHARS = 200
+
+# Threads for the API calls a recall query makes at once; two per query, so
+# this lets two sessions recall at the same time
+RECALL_WORKERS = 4
+_recall_executor = ThreadPoolExecutor(max_workers=RECALL_WORKERS, thread_name_prefix="memory-recall")
+
+def _normalize(embedding):
+    """L2-normalize an embedding as a float32 array."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+def _lookup_recall_cache(query, version, query_vector=None):
+    """
+    Find a recent recall result for the same or a near-identical query.
+    
+    Args:
+        query (str): The natural language query
+        version (tuple): Memories file version the result must belong to
+        query_vector (np.ndarray): Normalized query embedding, or None to
+            match the exact query text only
+        
+    Returns:
+        list: Ranked memory IDs, or None on a miss
+    """
+    now = time.monotonic()
+    with _query_cache_lock:
+        # Drop expired entries and results for an older set of memories
+        for key in [key for key, entry in _query_cache.items()
+                    if now - entry[3] > QUERY_CACHE_TTL or entry[1] != version]:
+            del _query_cache[key]
+        
+        key = query if query in _query_cache else None
+        if key is None and query_vector is not None:
+            keys = [k for k, entry in _query_cache.items() if len(entry[0]) == len(query_vector)]
+            if keys:
+                similarities = np.stack([_query_cache[k][0] for k in keys]) @ query_vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= QUERY_CACHE_SIMILARITY:
+                    key = keys[best]
+        if key is None:
+            return None
+        
+        _query_cache.move_to_end(key)
+        return _query_cache[key][2]
+
+def _store_recall_cache(query, query_vector, version, results):
+    """
+    Remember the ranking for a recall query, evicting the least recently used.
+    
+    Args:
+        query (str): The natural language query
+        query_vector (np.ndarray): Normalized query embedding
+        version (tuple): Memories file version the result belongs to
+        results (list): Ranked memories returned for the query
+    """
+    with _query_cache_lock:
+        _query_cache[query] = (query_vector, version, [m.get('id') for m in results], time.monotonic())
+        _query_cache.move_to_end(query)
+        while len(_query_cache) > QUERY_CACHE_SIZE:
+            _query_cache.popitem(last=False)
+
+def _memories_by_ids(memory_ids, memories):
+    """Look up memories by ID, in the order of the IDs."""
+    memory_map = {m.get('id'): m for m in memories}
+    return [memory_map[memory_id] for memory_id in memory_ids if memory_id in memory_map]
+
+def _contains_any(value, terms, matches):
+    """
+    Check whether any lowercased term is a substring of a value, ignoring case.
+    
+    Args:
+        value (str): Field value of a memory
+        terms (list): Lowercased search terms
+        matches (dict): Results for values already checked, updated in place
+        
+    Returns:
+        bool: True if any term occurs in the value
+    """
+    matched = matches.get(value)
+    if matched is None:
+        value_lower = value.lower()
+        matched = matches[value] = any(term in value_lower for term in terms)
+    return matched
+
+def extract_search_params(query):
+    """
+    Use OpenAI to extract search parameters from a recall query. Raises if
+    the API call fails.
+    
+    Args:
+        query (str): The natural language query for memory recall
+        
+    Returns:
+        dict: Search parameters such as emotions, people and locations
+    """
+    search_params_response = get_client().chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {
+                "role": "system",
+                "content": "You are an expert at understanding memory recall queries. "
+                "Given a query about someone's memories, extract key search parameters like: "
+                "- Emotions mentioned (happy, sad, etc.) "
+                "- People mentioned "
+                "- Time periods mentioned (last week, childhood, etc.) "
+                "- Locations mentioned "
+                "- Topics or themes mentioned "
+                "Respond with a JSON object containing these parameters."
+            },
+            {"role": "user", "content": query}
+        ],
+        response_format={"type": "json_object"},
+    )
+    
+    # Parse search parameters
+    return json.loads(search_params_response.choices[0].message.content)
 
 def recall_memories(query, memories):
     """
@@ -220,66 +705,65 @@ def recall_memories(query, memories):
             # Bonus for people matches
             score += sum(2 for word in query_words if word in memory_people)
             
-            # Store score
-            memory_copy = memory.copy()
-            memory_copy['relevance_score'] = score
-            scored_memories.append(memory_copy)
+            # Pair the score with the memory instead of copying it
+            scored_memories.append((score, memory))
         
-        # Sort by score in descending order
-        return sorted(scored_memories, key=lambda x: x.get('relevance_score', 0), reverse=True)
+        # Keep the best-scoring memories, in descending order
+        best = heapq.nlargest(RECALL_RESULT_LIMIT, scored_memories, key=itemgetter(0))
+        return [memory for _, memory in best]
+    
+    # Imported here because data_store pulls in Streamlit
+    from data_store import get_memories_version
+    version = get_memories_version()
+    
+    # Same query as a recent one: reuse its ranking without any API calls
+    cached_ids = _lookup_recall_cache(query, version)
+    if cached_ids is not None:
+        return _memories_by_ids(cached_ids, memories)
     
     try:
-        # Generate query embedding for semantic search
-        query_embedding = generate_memory_embedding(query)
+        # The query embedding and the search parameters don't depend on each
+        # other, so both API calls run at once
+        embedding_future = _recall_executor.submit(generate_memory_embedding, query)
+        params_future = _recall_executor.submit(extract_search_params, query)
+        query_embedding = embedding_future.result()
+        query_vector = _normalize(query_embedding)
+        
+        # Near-identical to a recent query: reuse its ranking and skip the
+        # remaining API calls
+        cached_ids = _lookup_recall_cache(query, version, query_vector)
+        if cached_ids is not None:
+            return _memories_by_ids(cached_ids, memories)
         
         try:
             # Try to use OpenAI to extract search parameters
-            search_params_response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert at understanding memory recall queries. "
-                        "Given a query about someone's memories, extract key search parameters like: "
-                        "- Emotions mentioned (happy, sad, etc.) "
-                        "- People mentioned "
-                        "- Time periods mentioned (last week, childhood, etc.) "
-                        "- Locations mentioned "
-                        "- Topics or themes mentioned "
-                        "Respond with a JSON object containing these parameters."
-                    },
-                    {"role": "user", "content": query}
-                ],
-                response_format={"type": "json_object"},
-            )
+            search_params = params_future.result()
             
-            # Parse search parameters
-            search_params = json.loads(search_params_response.choices[0].message.content)
+            # Filter memories based on explicit search parameters.
+            # Lowercase the wanted values once; emotions and locations repeat
+            # across memories, so each distinct value is only matched once
+            wanted_emotions = [emotion.lower() for emotion in search_params.get('emotions') or []]
+            wanted_people = {person.lower() for person in search_params.get('people') or []}
+            wanted_locations = [location.lower() for location in search_params.get('locations') or []]
+            emotion_matches = {}
+            location_matches = {}
             
-            # Filter memories based on explicit search parameters
-            filtered_memories = memories.copy()
-            
-            if 'emotions' in search_params and search_params['emotions']:
-                filtered_memories = [
-                    m for m in filtered_memories 
-                    if any(emotion.lower() in m.get('emotion', '').lower() for emotion in search_params['emotions'])
-                ]
-            
-            if 'people' in search_params and search_params['people']:
-                filtered_memories = [
-                    m for m in filtered_memories 
-                    if any(person.lower() in [p.lower() for p in m.get('people', [])] for person in search_params['people'])
-                ]
-            
-            if 'locations' in search_params and search_params['locations']:
-                filtered_memories = [
-                    m for m in filtered_memories 
-                    if any(location.lower() in m.get('location', '').lower() for location in search_params['locations'])
-                ]
+            # One pass over the memories, moving on at the first failed filter
+            filtered_memories = []
+            for m in memories:
+                if wanted_emotions and not _contains_any(m.get('emotion', ''), wanted_emotions, emotion_matches):
+                    continue
+                # People match by whole name, ignoring case, as the original list
+                # membership test did; emotions and locations match substrings
+                # (so "happy" finds "Happy" and "Very happy")
+                if wanted_people and wanted_people.isdisjoint(p.lower() for p in m.get('people', [])):
+                    continue
+                if wanted_locations and not _contains_any(m.get('location', ''), wanted_locations, location_matches):
+                    continue
+                filtered_memories.append(m)
         except Exception as api_error:
             print(f"API error when extracting search parameters: {api_error}")
             # Fall back to basic filtering
-            filtered_memories = memories.copy()
             
             # Extract potential keywords from query
             query_lower = query.lower()
@@ -289,81 +773,110 @@ def recall_memories(query, memories):
             for emotion in common_emotions:
                 if emotion in query_lower:
                     filtered_memories = [
-                        m for m in filtered_memories 
+                        m for m in memories 
                         if emotion in m.get('emotion', '').lower()
                     ]
                     break
+            else:
+                filtered_memories = list(memories)
         
         # If we have embeddings for semantic similarity
-        if query_embedding and filtered_memories:
-            # Calculate cosine similarity between query and memory embeddings
-            for memory in filtered_memories:
-                if memory.get('embedding'):
-                    # Make sure we're comparing vectors of the same length
-                    min_len = min(len(query_embedding), len(memory.get('embedding')))
-                    # Simple cosine similarity - dot product of normalized vectors
-                    similarity = sum(a*b for a, b in zip(query_embedding[:min_len], memory.get('embedding')[:min_len]))
-                    memory['relevance_score'] = similarity
-                else:
-                    memory['relevance_score'] = 0
+        if query_embedding is not None and len(filtered_memories):
+            # Cosine similarity against the stored embedding matrix
+            similarities = semantic_search(query_embedding)
+            scored_memories = [(similarities.get(m.get('id'), 0), m) for m in filtered_memories]
             
-            # Sort by relevance score
-            filtered_memories.sort(key=lambda x: x.get('relevance_score', 0), reverse=True)
+            # Keep the most relevant memories, in descending order
+            best = heapq.nlargest(RECALL_RESULT_LIMIT, scored_memories, key=itemgetter(0))
+            filtered_memories = [m for _, m in best]
         
         try:
             # Try to use OpenAI for final ranking
             if filtered_memories:
+                top_memories = filtered_memories[:20]  # Limit to 20 for API constraints
+                # Short summaries keep the prompt small; the model only returns IDs
                 memories_json = json.dumps([{
                     'id': m.get('id'),
-                    'text': m.get('text'),
-                    'date': m.get('date'),
-                    'emotion': m.get('emotion'),
-                    'people': m.get('people', []),
-                    'location': m.get('location')
-                } for m in filtered_memories[:20]])  # Limit to 20 for API constraints
+                    'text': (m.get('text') or '')[:RANKING_TEXT_CHARS],
+                    'date': (m.get('date') or '')[:10],
+                    'emotion': m.get('emotion')
+                } for m in top_memories])
                 
-                final_ranking_response = client.chat.completions.create(
+                final_ranking_response = get_client().beta.chat.completions.parse(
                     model="gpt-4o",
                     messages=[
                         {
                             "role": "system",
                             "content": "You are an expert at helping users recall their personal memories. "
                             "Given a query and a set of memories, select and rank the most relevant memories "
-                            "that best answer the query. Return a JSON array of memory IDs in order of relevance."
+                            "that best answer the query. Return the memory IDs in order of relevance."
                         },
                         {
                             "role": "user", 
                             "content": f"Query: {query}\n\nMemories: {memories_json}"
                         }
                     ],
-                    response_format={"type": "json_object"},
+                    response_format=Ranking,
                 )
                 
-                # Get the ranked memory IDs
-                final_ranking = json.loads(final_ranking_response.choices[0].message.content)
-                ranked_ids = final_ranking.get('memory_ids', [])
+                # Get the ranked memory IDs, already validated against the schema
+                ranked_ids = final_ranking_response.choices[0].message.parsed.memory_ids
                 
-                # Create a mapping of id to memory
-                memory_map = {m.get('id'): m for m in filtered_memories}
+                # Only the memories sent to the model can be ranked
+                memory_map = {m.get('id'): m for m in top_memories}
                 
                 # Reorder memories based on final ranking
-                ranked_memories = [memory_map[mem_id] for mem_id in ranked_ids if mem_id in memory_map]
+                ranked_memories = [memory_map.pop(mem_id) for mem_id in ranked_ids if mem_id in memory_map]
                 
                 # Add any remaining memories that weren't in the ranked list
-                remaining_memories = [m for m in filtered_memories if m.get('id') not in ranked_ids]
+                ranked_set = {m.get('id') for m in ranked_memories}
+                remaining_memories = [m for m in filtered_memories if m.get('id') not in ranked_set]
                 
-                return ranked_memories + remaining_memories
+                results = ranked_memories + remaining_memories
+                _store_recall_cache(query, query_vector, version, results)
+                return results
         except Exception as api_error:
             print(f"API error in final ranking: {api_error}")
             # API failed, just use the filtered memories
         
-        return filtered_memories if filtered_memories else keyword_search(query, memories)
+        results = filtered_memories if filtered_memories else keyword_search(query, memories)
+        _store_recall_cache(query, query_vector, version, results)
+        return results
     
     except Exception as e:
         print(f"Error recalling memories: {e}")
         # Fall back to simple keyword search
         return keyword_search(query, memories)
 
+@functools.lru_cache(maxsize=EMOTION_CACHE_SIZE)
+def analyze_emotion_with_api(text):
+    """
+    Detect the dominant emotion of a text with OpenAI. Raises if the API
+    call fails; successful results are memoized per text.
+    
+    Args:
+        text (str): The memory text
+        
+    Returns:
+        str: The dominant emotion detected
+    """
+    response = get_client().chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {
+                "role": "system",
+                "content": "You are an expert at detecting emotions in text. "
+                "Given a personal memory, identify the dominant emotion expressed. "
+                "Choose from: Happy, Sad, Angry, Surprised, Anxious, Peaceful, Nostalgic, "
+                "Excited, Grateful, Confused, Proud, Embarrassed, Hopeful, or Neutral. "
+                "Respond with just the emotion name."
+            },
+            {"role": "user", "content": text}
+        ]
+    )
+    
+    return response.choices[0].message.content.strip()
+
 def analyze_emotion(text):
     """
     Analyze the emotional content of a memory.
@@ -374,63 +887,15 @@ def analyze_emotion(text):
     Returns:
         str: The dominant emotion detected
     """
-    # List of emotions to check for
-    emotions = {
-        'Happy': ['happy', 'joy', 'delighted', 'pleased', 'cheerful', 'content', 'joy'],
-        'Sad': ['sad', 'unhappy', 'depressed', 'down', 'blue', 'upset', 'gloomy'],
-        'Angry': ['angry', 'mad', 'furious', 'annoyed', 'irritated', 'frustrated'],
-        'Surprised': ['surprised', 'shocked', 'astonished', 'amazed', 'stunned'],
-        'Anxious': ['anxious', 'worried', 'nervous', 'stressed', 'uneasy', 'concerned'],
-        'Peaceful': ['peaceful', 'calm', 'relaxed', 'tranquil', 'serene', 'content'],
-        'Nostalgic': ['nostalgic', 'remember', 'memory', 'past', 'childhood', 'reminisce'],
-        'Excited': ['excited', 'thrilled', 'eager', 'enthusiastic', 'energetic'],
-        'Grateful': ['grateful', 'thankful', 'appreciate', 'blessed', 'fortunate'],
-        'Confused': ['confused', 'puzzled', 'perplexed', 'bewildered', 'uncertain'],
-        'Proud': ['proud', 'accomplished', 'achievement', 'satisfied'],
-        'Embarrassed': ['embarrassed', 'ashamed', 'humiliated', 'mortified'],
-        'Hopeful': ['hopeful', 'optimistic', 'looking forward', 'anticipate'],
-        'Neutral': []  # Default if no other emotion is detected
-    }
-    
     try:
         # Try to use the OpenAI API for advanced emotion analysis
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert at detecting emotions in text. "
-                    "Given a personal memory, identify the dominant emotion expressed. "
-                    "Choose from: Happy, Sad, Angry, Surprised, Anxious, Peaceful, Nostalgic, "
-                    "Excited, Grateful, Confused, Proud, Embarrassed, Hopeful, or Neutral. "
-                    "Respond with just the emotion name."
-                },
-                {"role": "user", "content": text}
-            ]
-        )
-        
-        emotion = response.choices[0].message.content.strip()
-        return emotion
+        return analyze_emotion_with_api(text)
     
     except Exception as e:
         print(f"Error analyzing emotion: {e}")
         
         # Fall back to basic keyword-based analysis
-        text_lower = text.lower()
-        emotion_scores = {emotion: 0 for emotion in emotions}
-        
-        # Count emotion keyword occurrences
-        for emotion, keywords in emotions.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    emotion_scores[emotion] += 1
-        
-        # If we found emotional content, return the dominant emotion
-        if any(emotion_scores.values()):
-            return max(emotion_scores.items(), key=lambda x: x[1])[0]
-            
-        # Default fallback
-        return "Neutral"
+        return _dominant_emotion(text, EMOTION_KEYWORDS, _EMOTION_AUTOMATON)
 
 def summarize_memories(memories, time_period):
     """
@@ -450,61 +915,62 @@ def summarize_memories(memories, time_period):
         if total_memories == 0:
             return "No memories found for this time period."
             
-        # Get emotional trends
-        emotions = {}
-        for memory in memory_list:
-            emotion = memory.get('emotion', 'Neutral')
-            emotions[emotion] = emotions.get(emotion, 0) + 1
-        
-        # Find dominant emotion
-        dominant_emotion = max(emotions.items(), key=lambda x: x[1])[0] if emotions else "Neutral"
-        
-        # Extract locations
-        locations = {}
+        # Count emotions, locations and people in a single pass
+        emotions = Counter()
+        locations = Counter()
+        people = Counter()
         for memory in memory_list:
+            emotions[memory.get('emotion', 'Neutral')] += 1
             loc = memory.get('location', 'Unknown')
             if loc != 'Unknown':
-                locations[loc] = locations.get(loc, 0) + 1
+                locations[loc] += 1
+            people.update(memory.get('people', []))
+        
+        # Find dominant emotion
+        dominant_emotion = emotions.most_common(1)[0][0] if emotions else "Neutral"
+        other_emotions = [e for e in emotions if e != dominant_emotion][:3]
         
         # Find common locations
-        common_locations = sorted(locations.items(), key=lambda x: x[1], reverse=True)[:3]
+        common_locations = locations.most_common(3)
         location_text = ", ".join([loc for loc, count in common_locations]) if common_locations else "various places"
         
-        # Extract people
-        people = {}
-        for memory in memory_list:
-            for person in memory.get('people', []):
-                people[person] = people.get(person, 0) + 1
-        
         # Find frequently mentioned people
-        frequent_people = sorted(people.items(), key=lambda x: x[1], reverse=True)[:3]
-        people_text = ", ".join([person for person, count in frequent_people]) if frequent_people else "various people"
-        
-        # Generate basic summary
-        summary = f"""
-### Your {period} in Review
-
-During this period, you recorded **{total_memories} memories**. 
-
-**Emotional Trends:** 
-You primarily felt **{dominant_emotion}** during this time. {
-"Other emotions you experienced include " + ", ".join([e for e in emotions.keys() if e != dominant_emotion][:3]) + "." 
-if len(emotions) > 1 else ""
-}
-
-**Places & People:** 
-Your memories took place in {location_text}. {
-"You shared these moments with " + people_text + "." if people_text != "various people" else ""
-}
-
-**Reflection:**
-This {period.lower()} appears to have been a time of {
-"joy and positivity" if dominant_emotion in ["Happy", "Excited", "Grateful", "Peaceful"] 
-else "reflection and introspection" if dominant_emotion in ["Nostalgic", "Hopeful"] 
-else "challenges and growth" if dominant_emotion in ["Sad", "Angry", "Anxious"] 
-else "various experiences"
-}. Remember that each memory, whether positive or challenging, contributes to your personal journey.
-        """
+        frequent_people = people.most_common(3)
+        
+        if dominant_emotion in ["Happy", "Excited", "Grateful", "Peaceful"]:
+            period_tone = "joy and positivity"
+        elif dominant_emotion in ["Nostalgic", "Hopeful"]:
+            period_tone = "reflection and introspection"
+        elif dominant_emotion in ["Sad", "Angry", "Anxious"]:
+            period_tone = "challenges and growth"
+        else:
+            period_tone = "various experiences"
+        
+        # Generate basic summary, one section at a time
+        emotion_text = f"You primarily felt **{dominant_emotion}** during this time."
+        if other_emotions:
+            emotion_text += f" Other emotions you experienced include {', '.join(other_emotions)}."
+        
+        places_text = f"Your memories took place in {location_text}."
+        if frequent_people:
+            places_text += f" You shared these moments with {', '.join([person for person, count in frequent_people])}."
+        
+        parts = [
+            f"### Your {period} in Review",
+            "",
+            f"During this period, you recorded **{total_memories} memories**.",
+            "",
+            "**Emotional Trends:**",
+            emotion_text,
+            "",
+            "**Places & People:**",
+            places_text,
+            "",
+            "**Reflection:**",
+            f"This {period.lower()} appears to have been a time of {period_tone}. "
+            "Remember that each memory, whether positive or challenging, contributes to your personal journey."
+        ]
+        summary = "\n".join(parts)
         
         return summary
     
@@ -523,7 +989,7 @@ else "various experiences"
         
         memories_combined = "\n---\n".join(memories_text)
         
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
             model="gpt-4o",
             messages=[
                 {
@@ -0,0 +1,119 @@
+import os
+import json
+import hashlib
+import numpy as np
+import streamlit as st
+from data_store import DATA_DIRECTORY
+from memory_processor import (
+    basic_memory_analysis,
+    call_with_retries,
+    fallback_embedding,
+    fit_embedding,
+    generate_embedding_with_api,
+    process_memory_with_api
+)
+
+# Constants
+EMBEDDING_CACHE_DIRECTORY = os.path.join(DATA_DIRECTORY, "emb_cache")
+PROCESSED_CACHE_DIRECTORY = os.path.join(DATA_DIRECTORY, "proc_cache")
+
+def content_hash(text):
+    """
+    Get the cache key for a memory text.
+    
+    Args:
+        text (str): The memory text
+        
+    Returns:
+        str: SHA256 hex digest of the stripped text
+    """
+    return hashlib.sha256(text.strip().encode('utf-8')).hexdigest()
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def _cached_api_embedding(text_hash, _text):
+    """
+    Get the API embedding for a text, from disk if it was embedded before.
+    
+    Exceptions aren't cached, so API failures are retried on the next call.
+    
+    Args:
+        text_hash (str): content_hash() of the text, used as the cache key
+        _text (str): The text itself (not hashed by Streamlit)
+        
+    Returns:
+        numpy.ndarray: (EMBED_DIM,) vector embedding of the text
+    """
+    path = os.path.join(EMBEDDING_CACHE_DIRECTORY, f"{text_hash}.npy")
+    if os.path.exists(path):
+        return fit_embedding(np.load(path))
+    
+    embedding = fit_embedding(generate_embedding_with_api(_text))
+    os.makedirs(EMBEDDING_CACHE_DIRECTORY, exist_ok=True)
+    # float16 halves the cache size; search only needs cosine-level precision
+    np.save(path, embedding.astype(np.float16))
+    return embedding
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def _cached_api_processing(text_hash, _text):
+    """
+    Get the API analysis for a text, from disk if it was processed before.
+    
+    Args:
+        text_hash (str): content_hash() of the text, used as the cache key
+        _text (str): The text itself (not hashed by Streamlit)
+        
+    Returns:
+        dict: Processed memory with contextual information
+    """
+    path = os.path.join(PROCESSED_CACHE_DIRECTORY, f"{text_hash}.json")
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f)
+    
+    processed = process_memory_with_api(_text)
+    os.makedirs(PROCESSED_CACHE_DIRECTORY, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(processed, f)
+    return processed
+
+def analyze_memory(text):
+    """
+    Get the API analysis of a memory, for background enrichment.
+    
+    Transient API errors are retried with backoff before falling back to
+    the offline analysis.
+    
+    Args:
+        text (str): The memory text
+        
+    Returns:
+        dict: Processed memory with contextual information
+    """
+    try:
+        return call_with_retries(_cached_api_processing, content_hash(text), text)
+    except Exception as e:
+        print(f"Error processing memory: {e}")
+        return basic_memory_analysis(text)
+
+def analyze_and_embed(text):
+    """
+    Get the API analysis and embedding of a memory, for background enrichment.
+    
+    Transient API errors are retried with backoff before falling back to
+    the offline analysis and pseudo-embedding.
+    
+    Args:
+        text (str): The memory text
+        
+    Returns:
+        tuple: (processed memory dict, vector embedding)
+    """
+    processed = analyze_memory(text)
+    
+    try:
+        embedding = call_with_retries(_cached_api_embedding, content_hash(text), text)
+    except Exception as e:
+        print(f"Error generating embedding: {e}")
+        embedding = fallback_embedding(text)
+    
+    return processed, embedding
@@ -1,8 +1,18 @@
 import datetime
+import functools
 import random
 import string
 import re
 
+# Patterns for the simple people and location heuristics, compiled once
+WITH_PATTERN = re.compile(r'with\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)')
+AND_PATTERN = re.compile(r'and\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)')
+AT_PATTERN = re.compile(r'at\s+the\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)')
+IN_PATTERN = re.compile(r'in\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)')
+
+# Dates repeat across memories and reruns; parsed and formatted values are immutable
+DATE_CACHE_SIZE = 8192
+
 def get_current_date():
     """
     Get the current date and time in ISO format.
@@ -12,6 +22,7 @@ def get_current_date():
     """
     return datetime.datetime.now().isoformat()
 
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
 def parse_date(date_str):
     """
     Parse a date string into a datetime object.
@@ -27,6 +38,7 @@ def parse_date(date_str):
     except (ValueError, TypeError):
         return None
 
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
 def format_date(date_obj, format_str="%B %d, %Y"):
     """
     Format a datetime object as a string.
@@ -53,8 +65,8 @@ def generate_id():
     Returns:
         str: Random ID string
     """
-    letters = string.ascii_lowercase
-    return ''.join(random.choice(letters) for _ in range(10))
+    # One C-level call instead of a random.choice() per character
+    return ''.join(random.choices(string.ascii_lowercase, k=10))
 
 def extract_people_from_text(text):
     """
@@ -71,21 +83,16 @@ def extract_people_from_text(text):
     # A more sophisticated version would use NER (Named Entity Recognition)
     
     # Look for patterns like "with [Name]" or "and [Name]"
-    with_pattern = re.compile(r'with\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)')
-    and_pattern = re.compile(r'and\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)')
-    
     people = []
     
     # Extract names from "with [Name]" pattern
-    with_matches = with_pattern.findall(text)
-    people.extend(with_matches)
+    people.extend(WITH_PATTERN.findall(text))
     
     # Extract names from "and [Name]" pattern
-    and_matches = and_pattern.findall(text)
-    people.extend(and_matches)
+    people.extend(AND_PATTERN.findall(text))
     
-    # Remove duplicates and return
-    return list(set(people))
+    # Remove duplicates, keeping the order names were found in
+    return list(dict.fromkeys(people))
 
 def extract_location_from_text(text):
     """
@@ -102,18 +109,15 @@ def extract_location_from_text(text):
     # A more sophisticated version would use NER (Named Entity Recognition)
     
     # Look for patterns like "at [Location]" or "in [Location]"
-    at_pattern = re.compile(r'at\s+the\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)')
-    in_pattern = re.compile(r'in\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)')
-    
     # Extract location from "at [Location]" pattern
-    at_matches = at_pattern.findall(text)
-    if at_matches:
-        return at_matches[0]
+    at_match = AT_PATTERN.search(text)
+    if at_match:
+        return at_match.group(1)
     
     # Extract location from "in [Location]" pattern
-    in_matches = in_pattern.findall(text)
-    if in_matches:
-        return in_matches[0]
+    in_match = IN_PATTERN.search(text)
+    if in_match:
+        return in_match.group(1)
     
     return None
 
@@ -1,8 +1,521 @@
 import streamlit as st
-import networkx as nx
-import plotly.graph_objects as go
-from collections import defaultdict
+import json
+import datetime
+import numpy as np
+import pandas as pd
 import random
+from data_store import EMBEDDING_DIM, get_embedding_vectors, get_memories_version
+
+# NetworkX and Plotly are slow to import and only needed once a mind map is
+# built, so _import_graph_libraries() loads them on first use
+nx = None
+go = None
+
+try:
+    from scipy import optimize, sparse, spatial
+except ImportError:
+    # The layout falls back to nx.spring_layout
+    optimize = None
+    sparse = None
+    spatial = None
+
+def _import_graph_libraries():
+    """Import NetworkX and Plotly into the module globals on first use."""
+    global nx, go
+    if go is None:
+        import networkx
+        import plotly.graph_objects
+        nx = networkx
+        go = plotly.graph_objects
+
+# Memories whose embeddings are at least this similar get a "meaning" edge
+SIMILARITY_THRESHOLD = 0.9
+# Rows of the similarity matrix computed at once when finding "meaning" edges
+SIMILARITY_BLOCK_ROWS = 1024
+# Each emotion links at most this many randomly chosen memories
+MAX_MEMORIES_PER_EMOTION = 10
+# Kinds of connection drawn on the mind map, most specific first; that order
+# decides which one is drawn when two memories are connected in several ways
+CONNECTION_TYPES = ('topic', 'person', 'location', 'meaning', 'emotion')
+# L-BFGS iterations spent on the mind map layout
+LAYOUT_MAX_ITERATIONS = 50
+# Pull towards the origin, so unconnected memories don't drift off forever
+LAYOUT_GRAVITY = 1.0
+# Added to squared distances so coincident nodes don't blow up the repulsion
+LAYOUT_EPSILON = 1e-4
+# Above this many nodes, repulsion from distant nodes is approximated by
+# their grid cell's centroid; below it the exact all-pairs matrix products win
+BARNES_HUT_MIN_NODES = 1500
+# Opening angle: cells further than cell size / theta away are approximated
+BARNES_HUT_THETA = 0.5
+# Maps with at most this many nodes are placed in closed form instead of
+# running the force-directed optimization
+SMALL_LAYOUT_NODES = 30
+# Above this many nodes, the layout starts from a layout of one super-node
+# per group (a memory's first topic, else its emotion) and only refines it
+MULTILEVEL_MIN_NODES = 500
+# L-BFGS iterations spent refining a multilevel layout
+MULTILEVEL_REFINE_ITERATIONS = 20
+# Time windows the mind map can be filtered to, in days (None for all time)
+MIND_MAP_WINDOWS = {
+    'Last week': 7,
+    'Last month': 30,
+    'Last 6 months': 182,
+    'All time': None,
+}
+# Mind map figures kept in the cache: one per window for the current file
+# version and the one before it; older versions are never asked for again
+MIND_MAP_CACHE_ENTRIES = 2 * len(MIND_MAP_WINDOWS)
+# Draw with WebGL (Scattergl) once the map has more points than this; SVG
+# looks crisper for small maps but bogs the browser down for large ones
+WEBGL_MIN_POINTS = 1000
+
+def _reservoir_sample(items, k):
+    """
+    Pick up to k items uniformly at random from an iterable in one pass.
+    
+    Uses Algorithm R, so only k items are ever held in memory no matter how
+    many the iterable produces.
+    
+    Args:
+        items (iterable): Items to sample from
+        k (int): Maximum number of items to keep, or None to keep them all
+        
+    Returns:
+        list: The sampled items
+    """
+    if k is None:
+        return list(items)
+    reservoir = []
+    for seen, item in enumerate(items):
+        if seen < k:
+            reservoir.append(item)
+        else:
+            slot = random.randint(0, seen)
+            if slot < k:
+                reservoir[slot] = item
+    return reservoir
+
+def _decode_pair_indices(indices, count):
+    """
+    Turn indices into the list of all pairs of count items back into pairs.
+    
+    Pair (a, b) with a < b has index b * (b - 1) / 2 + a, so b is recovered
+    from a triangular-number root and a from the remainder.
+    
+    Args:
+        indices (numpy.ndarray): Pair indices, each below count * (count - 1) / 2
+        count (int): Number of items the pairs are drawn from
+        
+    Returns:
+        tuple: (a, b) integer arrays with a < b < count
+    """
+    b = ((1 + np.sqrt(1 + 8 * indices.astype(np.float64))) // 2).astype(np.int64)
+    # Correct the odd off-by-one from floating point rounding
+    b -= b * (b - 1) // 2 > indices
+    b += (b + 1) * b // 2 <= indices
+    return indices - b * (b - 1) // 2, b
+
+def _shared_value_pairs(values, k=None):
+    """
+    Find pairs of memories that share a value, sampling within each value's group.
+    
+    The values are exploded and factorized once, and sorting the integer
+    codes gives each value's memories as one run. A group of g memories
+    has g * (g - 1) / 2 pairs; instead of listing them, at most k pair
+    indices are drawn and decoded, so the work grows with the sample size
+    rather than with the number of pairs.
+    
+    Args:
+        values (pandas.Series): One list of values, single value or None
+            per memory, indexed by memory position
+        k (int): Most pairs drawn per value, or None for all of them
+        
+    Yields:
+        tuple: (i, j, shared_value) with i < j
+    """
+    exploded = values.explode().dropna()
+    if exploded.empty:
+        return
+    codes, vocabulary = pd.factorize(exploded)
+    vocabulary = vocabulary.tolist()
+    order = np.argsort(codes, kind='stable')
+    starts = np.r_[0, np.flatnonzero(np.diff(codes[order])) + 1]
+    groups = np.split(exploded.index.to_numpy()[order], starts[1:])
+    
+    for code, members in zip(codes[order][starts].tolist(), groups):
+        # Sorted, and a memory listing the same value twice counts once
+        members = np.unique(members)
+        count = len(members)
+        pair_count = count * (count - 1) // 2
+        if pair_count == 0:
+            continue
+        if k is None or pair_count <= k:
+            first, second = np.triu_indices(count, k=1)
+        else:
+            first, second = _decode_pair_indices(np.array(random.sample(range(pair_count), k)), count)
+        label = vocabulary[code]
+        for i, j in zip(members[first].tolist(), members[second].tolist()):
+            yield i, j, label
+
+def _share_budget(samples, budget):
+    """
+    Split a connection budget evenly across connection types.
+    
+    Types with fewer pairs than their share keep them all and hand what is
+    left over to the other types, so the budget is filled whenever there
+    are enough pairs overall.
+    
+    Args:
+        samples (dict): Connection type -> list of sampled pairs
+        budget (int): Maximum number of pairs kept in total
+        
+    Returns:
+        dict: Connection type -> random subset of its pairs
+    """
+    shares = {}
+    remaining = budget
+    ordered = sorted(samples, key=lambda conn_type: len(samples[conn_type]))
+    for position, conn_type in enumerate(ordered):
+        share = min(len(samples[conn_type]), remaining // (len(ordered) - position))
+        shares[conn_type] = random.sample(samples[conn_type], share)
+        remaining -= share
+    return shares
+
+def compute_edges(memories, max_connections=None):
+    """
+    Compute the connections between memories for the mind map.
+    
+    Memories are connected when they share a topic, person, emotion or
+    location, or when their embeddings are close. Shared attributes are
+    sampled per value group and similarity comes from one E @ E.T product,
+    instead of nested loops over memory pairs.
+    
+    Each value group draws at most max_connections of its pairs, each
+    connection type is then reservoir-sampled, and the budget is shared
+    evenly between the types so no single type crowds out the rest.
+    A pair connected in several ways is drawn once, as its most specific
+    connection type (the first in CONNECTION_TYPES).
+    
+    Args:
+        memories (list): List of memory objects
+        max_connections (int): Maximum connections kept, or None for all
+        
+    Returns:
+        list: (source_id, target_id, connection_type, label) tuples
+    """
+    # One frame for all attributes; missing columns come back as NaN
+    frame = pd.DataFrame(memories).reindex(columns=['id', 'topics', 'people', 'emotion', 'location'])
+    ids = frame['id'].tolist()
+    pairs_by_type = {}
+    
+    # Connect memories with similar topics
+    pairs_by_type['topic'] = _shared_value_pairs(frame['topics'], max_connections)
+    
+    # Connect memories with shared people
+    pairs_by_type['person'] = _shared_value_pairs(frame['people'], max_connections)
+    
+    # Connect memories with same emotion, limited per emotion to avoid overcrowding
+    emotions = frame['emotion'].fillna('Unknown')
+    # Integer codes sorted into runs give each emotion's members without hashing per row
+    emotion_codes, _ = pd.factorize(emotions)
+    order = np.argsort(emotion_codes, kind='stable')
+    runs = np.split(order, np.flatnonzero(np.diff(emotion_codes[order])) + 1)
+    chosen = [i for members in runs if len(members)
+              for i in random.sample(members.tolist(), min(MAX_MEMORIES_PER_EMOTION, len(members)))]
+    pairs_by_type['emotion'] = _shared_value_pairs(emotions.where(emotions.index.isin(chosen)), max_connections)
+    
+    # Connect memories with same location
+    pairs_by_type['location'] = _shared_value_pairs(frame['location'].replace({'Unknown': None, '': None}),
+                                                    max_connections)
+    
+    # Connect memories whose embeddings are close
+    pairs_by_type['meaning'] = _similar_pairs(ids)
+    
+    # No type can use more than the whole budget, so that bounds each sample
+    samples = {conn_type: _reservoir_sample(pairs_by_type[conn_type], max_connections)
+               for conn_type in CONNECTION_TYPES}
+    
+    # Drop pairs already sampled by a more specific type, or through another
+    # value of the same type, before sharing the budget, so no budget is
+    # spent on edges drawn on top of each other. Every pair has i < j
+    claimed = set()
+    for conn_type in CONNECTION_TYPES:
+        kept = []
+        for i, j, label in samples[conn_type]:
+            if (i, j) not in claimed:
+                claimed.add((i, j))
+                kept.append((i, j, label))
+        samples[conn_type] = kept
+    
+    if max_connections is not None:
+        samples = _share_budget(samples, max_connections)
+    
+    return [(ids[i], ids[j], conn_type, label)
+            for conn_type in CONNECTION_TYPES
+            for i, j, label in samples[conn_type]]
+
+def _similar_pairs(ids):
+    """
+    Find the pairs of memories whose embeddings are close.
+    
+    Args:
+        ids (list): IDs of the memories being mapped
+        
+    Yields:
+        tuple: (i, j, label) with i < j indexing into ids
+    """
+    # Only API embeddings; hashed fallback vectors aren't similar in meaning
+    embedding_ids, vectors = get_embedding_vectors(EMBEDDING_DIM)
+    position = {memory_id: i for i, memory_id in enumerate(ids)}
+    keep = [k for k, memory_id in enumerate(embedding_ids) if memory_id in position]
+    if len(keep) < 2:
+        return
+    kept = vectors[keep]
+    # Positions in ids of the kept rows
+    kept_positions = np.array([position[embedding_ids[k]] for k in keep])
+    # Rows are L2-normalized, so each block is a slice of the cosine
+    # similarity matrix; only SIMILARITY_BLOCK_ROWS rows of it exist at once
+    for start in range(0, len(kept), SIMILARITY_BLOCK_ROWS):
+        block = kept[start:start + SIMILARITY_BLOCK_ROWS] @ kept[start:].T
+        a, b = np.nonzero(block >= SIMILARITY_THRESHOLD)
+        # Keep each pair once, from the block holding its upper-triangle entry
+        upper = b > a
+        a, b = a[upper], b[upper]
+        scores = block[a, b]
+        i = kept_positions[start + a]
+        j = kept_positions[start + b]
+        for first, second, score in zip(np.minimum(i, j).tolist(), np.maximum(i, j).tolist(), scores.tolist()):
+            yield first, second, f"{score:.2f} similar"
+
+def _exact_repulsion(positions):
+    """
+    Logarithmic repulsion energy over every pair of nodes, and its gradient.
+    
+    Args:
+        positions (numpy.ndarray): (n, 2) node positions
+        
+    Returns:
+        tuple: (energy, (n, 2) gradient of the energy)
+    """
+    # Pairwise squared distances from one Gram matrix product
+    norms = (positions ** 2).sum(axis=1)
+    squared = np.maximum(norms[:, None] + norms[None, :] - 2 * positions @ positions.T, 0) + LAYOUT_EPSILON
+    np.fill_diagonal(squared, 1.0)
+    inverse = 1.0 / squared
+    np.fill_diagonal(inverse, 0.0)
+    # Repulsion force sum_j (x_i - x_j) / d_ij^2, as matrix products
+    force = positions * inverse.sum(axis=1)[:, None] - inverse @ positions
+    return -0.25 * np.log(squared).sum(), -force
+
+def _approximate_repulsion(positions):
+    """
+    Barnes-Hut style approximation of _exact_repulsion() for large graphs.
+    
+    Nodes are binned into a grid of square cells. Pairs of nodes in
+    nearby cells, found with a cKDTree over the cell coordinates, repel
+    exactly; further cells interact as single masses at their centroids,
+    so the far field costs O(cells^2) instead of O(n^2).
+    
+    Args:
+        positions (numpy.ndarray): (n, 2) node positions
+        
+    Returns:
+        tuple: (approximate energy, (n, 2) approximate gradient)
+    """
+    n = len(positions)
+    near = int(np.ceil(1 / BARNES_HUT_THETA))
+    lower = positions.min(axis=0)
+    # Size cells from the interquartile range so the dense middle of the map
+    # is about cbrt(n) cells across, balancing exact pairs against cell pairs
+    quartiles = np.percentile(positions, [25, 75], axis=0)
+    cell_size = max(2 * (quartiles[1] - quartiles[0]).max() / np.cbrt(n), LAYOUT_EPSILON)
+    cells = np.floor((positions - lower) / cell_size).astype(np.int64)
+    
+    # Exact repulsion between nodes whose cells are at most `near` apart
+    pairs = spatial.cKDTree(cells).query_pairs(near, p=np.inf, output_type='ndarray')
+    diff = positions[pairs[:, 0]] - positions[pairs[:, 1]]
+    squared = (diff ** 2).sum(axis=1) + LAYOUT_EPSILON
+    pair_force = diff / squared[:, None]
+    force = np.empty_like(positions)
+    for axis in range(2):
+        force[:, axis] = (np.bincount(pairs[:, 0], pair_force[:, axis], minlength=n)
+                          - np.bincount(pairs[:, 1], pair_force[:, axis], minlength=n))
+    value = -0.5 * np.log(squared).sum()
+    
+    # Distant cells repel each other as single masses at their centroids, and
+    # each node takes its cell's share of that force
+    occupied, members, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    members = members.ravel()
+    centroids = np.column_stack([np.bincount(members, positions[:, axis], minlength=len(occupied))
+                                 for axis in range(2)]) / counts[:, None]
+    far = np.abs(occupied[:, None, :] - occupied[None, :, :]).max(axis=2) > near
+    cell_diff = centroids[:, None, :] - centroids[None, :, :]
+    cell_squared = (cell_diff ** 2).sum(axis=2) + LAYOUT_EPSILON
+    weight = np.where(far, counts[None, :] / cell_squared, 0.0)
+    force += (weight[:, :, None] * cell_diff).sum(axis=1)[members]
+    value -= 0.25 * np.where(far, counts[:, None] * counts[None, :] * np.log(cell_squared), 0.0).sum()
+    return value, -force
+
+def _minimize_layout(G, nodes, start, max_iterations, weight=None):
+    """
+    Minimize the force-directed layout energy of a graph with L-BFGS.
+    
+    Args:
+        G (networkx.Graph): The graph to lay out
+        nodes (list): The graph's nodes, in the order of the rows of start
+        start (numpy.ndarray): (n, 2) starting positions
+        max_iterations (int): Maximum number of L-BFGS iterations
+        weight (str): Edge attribute used as spring strength, or None for 1
+        
+    Returns:
+        numpy.ndarray: (n, 2) positions in energy units
+    """
+    n = len(nodes)
+    adjacency = nx.to_scipy_sparse_array(G, nodelist=nodes, weight=weight, dtype=np.float64, format='csr')
+    laplacian = sparse.csr_matrix(sparse.diags(np.asarray(adjacency.sum(axis=1)).ravel()) - adjacency)
+    repulsion = _approximate_repulsion if n > BARNES_HUT_MIN_NODES else _exact_repulsion
+    
+    def energy(flat):
+        positions = flat.reshape(n, 2)
+        # Sum of squared edge lengths is trace(X^T L X), with gradient 2 L X
+        pulled = laplacian @ positions
+        repulsion_value, repulsion_gradient = repulsion(positions)
+        value = (0.5 * (positions * pulled).sum()
+                 + 0.5 * LAYOUT_GRAVITY * (positions ** 2).sum()
+                 + repulsion_value)
+        gradient = pulled + LAYOUT_GRAVITY * positions + repulsion_gradient
+        return value, gradient.ravel()
+    
+    result = optimize.minimize(energy, start.ravel(), method='L-BFGS-B', jac=True,
+                               options={'maxiter': max_iterations})
+    return result.x.reshape(n, 2)
+
+def _coarse_start(G, nodes, rng):
+    """
+    Starting positions for a large graph from a layout of its groups.
+    
+    Nodes with the same 'group' attribute are merged into one super-node,
+    joined to other super-nodes by springs as strong as the number of edges
+    between the groups. The small coarse graph is laid out first and every
+    node starts at its super-node, jittered and scaled to the fine graph.
+    
+    Args:
+        G (networkx.Graph): The graph to lay out
+        nodes (list): The graph's nodes
+        rng (numpy.random.Generator): Source of the random positions
+        
+    Returns:
+        numpy.ndarray: (n, 2) starting positions in energy units
+    """
+    codes, groups = pd.factorize(pd.Series([G.nodes[node].get('group', node) for node in nodes], dtype=object))
+    code_of = dict(zip(nodes, codes.tolist()))
+    
+    coarse = nx.Graph()
+    coarse.add_nodes_from(range(len(groups)))
+    for source, target in G.edges():
+        a, b = code_of[source], code_of[target]
+        if a != b:
+            previous = coarse.get_edge_data(a, b, default={'weight': 0})['weight']
+            coarse.add_edge(a, b, weight=previous + 1)
+    
+    coarse_positions = _minimize_layout(coarse, list(range(len(groups))),
+                                        rng.standard_normal((len(groups), 2)),
+                                        LAYOUT_MAX_ITERATIONS, weight='weight')
+    # The repulsion spreads n nodes over a radius of about sqrt(n)
+    scale = np.sqrt(len(nodes) / len(groups))
+    return coarse_positions[codes] * scale + rng.standard_normal((len(nodes), 2))
+
+def force_directed_layout(G, seed=42):
+    """
+    Lay out a graph by minimizing a force-directed energy with L-BFGS.
+    
+    Edges pull their nodes together like springs, every pair of nodes pushes
+    apart with a logarithmic repulsion and a weak gravity keeps the map
+    centred. The energy and its analytic gradient are computed with NumPy
+    and a sparse Laplacian, so SciPy's L-BFGS-B converges in far fewer
+    steps than nx.spring_layout's Python simulation. Large graphs use the
+    Barnes-Hut approximation of the repulsion and start from a coarse
+    layout of their groups, which then only needs a few refinement steps.
+    Small graphs skip the optimization and use a closed-form layout.
+    
+    Args:
+        G (networkx.Graph): The graph to lay out
+        seed (int): Seed for the random starting positions
+        
+    Returns:
+        dict: Mapping of node to (x, y) position scaled to [-1, 1]
+    """
+    _import_graph_libraries()
+    nodes = list(G.nodes())
+    n = len(nodes)
+    if n <= SMALL_LAYOUT_NODES:
+        # Kamada-Kawai is near-instant for a small connected graph; a circle
+        # keeps disconnected pieces from overlapping
+        if n < 2 or optimize is None or nx.number_connected_components(G) > 1:
+            return nx.circular_layout(G)
+        return nx.kamada_kawai_layout(G)
+    if optimize is None:
+        return nx.spring_layout(G, seed=seed)
+    
+    rng = np.random.default_rng(seed)
+    if n > MULTILEVEL_MIN_NODES:
+        positions = _minimize_layout(G, nodes, _coarse_start(G, nodes, rng), MULTILEVEL_REFINE_ITERATIONS)
+    else:
+        positions = _minimize_layout(G, nodes, rng.standard_normal((n, 2)), LAYOUT_MAX_ITERATIONS)
+    return dict(zip(nodes, nx.rescale_layout(positions)))
+
+def _window_memories(memories, days):
+    """
+    Select the memories created within the last number of days.
+    
+    Args:
+        memories (list): List of memory objects
+        days (int): Size of the window in days, or None for all memories
+        
+    Returns:
+        list: The memories inside the window
+    """
+    if days is None:
+        return memories
+    # ISO dates compare correctly as strings
+    cutoff = (datetime.datetime.now() - datetime.timedelta(days=days)).isoformat()
+    return [memory for memory in memories if (memory.get('date') or '') >= cutoff]
+
+def render_mind_map(memories, window='All time', max_connections=50):
+    """
+    Display the mind map of the given memories as a Plotly chart.
+    
+    Figure JSON is cached per file version and set of memories shown. Only
+    the selected window is built; other windows are built when the user
+    switches to them, and switching back is a cache lookup.
+    
+    Args:
+        memories (list): List of memory objects to visualize
+        window (str): Key of MIND_MAP_WINDOWS to show
+        max_connections (int): Maximum number of connections to display for visual clarity
+    """
+    selected = _window_memories(memories, MIND_MAP_WINDOWS[window])
+    memory_ids = tuple(memory.get('id') for memory in selected)
+    figure_json = _cached_mind_map_json(get_memories_version(), memory_ids, selected, max_connections)
+    # A plain dict goes straight to Streamlit without rebuilding a Figure
+    st.plotly_chart(json.loads(figure_json), use_container_width=True)
+
+@st.cache_data(show_spinner=False, max_entries=MIND_MAP_CACHE_ENTRIES)
+def _cached_mind_map_json(version, memory_ids, _memories, max_connections):
+    """
+    Cache the serialized generate_mind_map() figure.
+    
+    Args:
+        version (tuple): Value of get_memories_version()
+        memory_ids (tuple): IDs of the memories being mapped
+        _memories (list): The memories themselves (not hashed by Streamlit)
+        max_connections (int): Maximum number of connections to display
+        
+    Returns:
+        str: The mind map figure as Plotly JSON
+    """
+    return generate_mind_map(_memories, max_connections).to_json()
 
 def generate_mind_map(memories, max_connections=50):
     """
@@ -15,6 +528,8 @@ def generate_mind_map(memories, max_connections=50):
     Returns:
         plotly.graph_objects.Figure: Interactive mind map figure
     """
+    _import_graph_libraries()
+    
     # Create a graph
     G = nx.Graph()
     
@@ -26,73 +541,19 @@ def generate_mind_map(memories, max_connections=50):
                   label=memory.get('text')[:50] + '...' if len(memory.get('text')) > 50 else memory.get('text'),
                   date=memory.get('date')[:10],
                   emotion=memory.get('emotion', 'Unknown'),
+                  group=(memory.get('topics') or [memory.get('emotion', 'Unknown')])[0],
                   type='memory')
     
-    # Create connections based on shared properties
-    connections = []
-    
-    # Connect memories with similar topics
-    topic_memories = defaultdict(list)
-    for memory in memories:
-        for topic in memory.get('topics', []):
-            topic_memories[topic].append(memory.get('id'))
-    
-    for topic, mem_ids in topic_memories.items():
-        if len(mem_ids) > 1:
-            for i in range(len(mem_ids)):
-                for j in range(i+1, len(mem_ids)):
-                    connections.append((mem_ids[i], mem_ids[j], 'topic', topic))
-    
-    # Connect memories with shared people
-    people_memories = defaultdict(list)
-    for memory in memories:
-        for person in memory.get('people', []):
-            people_memories[person].append(memory.get('id'))
-    
-    for person, mem_ids in people_memories.items():
-        if len(mem_ids) > 1:
-            for i in range(len(mem_ids)):
-                for j in range(i+1, len(mem_ids)):
-                    connections.append((mem_ids[i], mem_ids[j], 'person', person))
-    
-    # Connect memories with same emotion
-    emotion_memories = defaultdict(list)
-    for memory in memories:
-        emotion = memory.get('emotion', 'Unknown')
-        emotion_memories[emotion].append(memory.get('id'))
-    
-    for emotion, mem_ids in emotion_memories.items():
-        if len(mem_ids) > 1:
-            # Limit connections per emotion to avoid overcrowding
-            sample_size = min(10, len(mem_ids))
-            sample_ids = random.sample(mem_ids, sample_size)
-            for i in range(len(sample_ids)):
-                for j in range(i+1, len(sample_ids)):
-                    connections.append((sample_ids[i], sample_ids[j], 'emotion', emotion))
-    
-    # Connect memories with same location
-    location_memories = defaultdict(list)
-    for memory in memories:
-        location = memory.get('location')
-        if location and location != 'Unknown':
-            location_memories[location].append(memory.get('id'))
-    
-    for location, mem_ids in location_memories.items():
-        if len(mem_ids) > 1:
-            for i in range(len(mem_ids)):
-                for j in range(i+1, len(mem_ids)):
-                    connections.append((mem_ids[i], mem_ids[j], 'location', location))
-    
-    # Limit the number of connections to avoid visual overload
-    if len(connections) > max_connections:
-        connections = random.sample(connections, max_connections)
+    # Create connections based on shared properties, sampling each type
+    # down as it is built to avoid visual overload
+    connections = compute_edges(memories, max_connections)
     
     # Add edges with attributes
     for source, target, conn_type, conn_label in connections:
         G.add_edge(source, target, type=conn_type, label=conn_label)
     
     # Use a force-directed layout algorithm
-    pos = nx.spring_layout(G, seed=42)
+    pos = force_directed_layout(G, seed=42)
     
     # Create a Plotly figure
     edge_traces = []
@@ -102,24 +563,42 @@ def generate_mind_map(memories, max_connections=50):
         'topic': 'rgba(65, 105, 225, 0.7)',    # Blue
         'person': 'rgba(255, 165, 0, 0.7)',    # Orange
         'emotion': 'rgba(50, 205, 50, 0.7)',   # Green
-        'location': 'rgba(147, 112, 219, 0.7)' # Purple
+        'location': 'rgba(147, 112, 219, 0.7)', # Purple
+        'meaning': 'rgba(232, 67, 147, 0.7)'   # Pink
     }
     
+    # Node coordinates as arrays, indexed by each node's position in G
+    node_index = {node: i for i, node in enumerate(G.nodes())}
+    coordinates = np.array([pos[node] for node in G.nodes()], dtype=np.float32).reshape(-1, 2)
+    # Contiguous copies of each axis for the edge gathers
+    node_xs = np.ascontiguousarray(coordinates[:, 0])
+    node_ys = np.ascontiguousarray(coordinates[:, 1])
+    
+    # Large maps are drawn with WebGL instead of SVG
+    scatter = go.Scattergl if G.number_of_nodes() + 3 * G.number_of_edges() > WEBGL_MIN_POINTS else go.Scatter
+    
+    # Group the edges by type in one pass
+    edges_by_type = {edge_type: [] for edge_type in color_map}
+    for source, target, data in G.edges(data=True):
+        edges_by_type.setdefault(data.get('type'), []).append((source, target, data.get('label', '')))
+    
     # Create traces for edges by type
     for edge_type in color_map.keys():
-        edge_x = []
-        edge_y = []
-        edge_text = []
-        
-        for edge in G.edges(data=True):
-            if edge[2].get('type') == edge_type:
-                x0, y0 = pos[edge[0]]
-                x1, y1 = pos[edge[1]]
-                edge_x.extend([x0, x1, None])
-                edge_y.extend([y0, y1, None])
-                edge_text.append(edge[2].get('label', ''))
-        
-        edge_trace = go.Scatter(
+        edges = edges_by_type[edge_type]
+        source_idx = np.fromiter((node_index[source] for source, _, _ in edges), dtype=np.intp, count=len(edges))
+        target_idx = np.fromiter((node_index[target] for _, target, _ in edges), dtype=np.intp, count=len(edges))
+        
+        # Each segment is source, target, gap; Plotly breaks lines at NaN
+        edge_x = np.full(3 * len(edges), np.nan, dtype=np.float32)
+        edge_y = np.full(3 * len(edges), np.nan, dtype=np.float32)
+        edge_x[0::3] = np.take(node_xs, source_idx)
+        edge_x[1::3] = np.take(node_xs, target_idx)
+        edge_y[0::3] = np.take(node_ys, source_idx)
+        edge_y[1::3] = np.take(node_ys, target_idx)
+        # One label per point, so hovering either end of a segment shows it
+        edge_text = np.repeat(np.array([label for _, _, label in edges], dtype=object), 3)
+        
+        edge_trace = scatter(
             x=edge_x, y=edge_y,
             line=dict(width=1.5, color=color_map[edge_type]),
             hoverinfo='text',
@@ -130,10 +609,7 @@ def generate_mind_map(memories, max_connections=50):
         edge_traces.append(edge_trace)
     
     # Create node trace
-    node_x = []
-    node_y = []
     node_text = []
-    node_size = []
     node_color = []
     
     # Color map for emotions
@@ -157,11 +633,11 @@ def generate_mind_map(memories, max_connections=50):
     # Default color for unknown emotions
     default_color = '#dfe6e9'
     
+    # Node size based on connections; NetworkX tracks each node's degree
+    degrees = np.fromiter((degree for _, degree in G.degree()), dtype=np.float32, count=G.number_of_nodes())
+    node_size = 15 + degrees * 2  # Base size + bonus for connections
+    
     for node in G.nodes():
-        x, y = pos[node]
-        node_x.append(x)
-        node_y.append(y)
-        
         # Node text for hover info
         node_info = G.nodes[node]
         text = f"Date: {node_info.get('date')}<br>"
@@ -169,25 +645,12 @@ def generate_mind_map(memories, max_connections=50):
         text += f"Emotion: {node_info.get('emotion')}"
         node_text.append(text)
         
-        # Node size based on connections - use a simpler approach
-        connections = 0
-        # Count direct edges to this node
-        for edge in G.edges():
-            if node in edge:
-                connections += 1
-                
-        # Use connections count for node size
-        degree_value = connections
-            
-        size = 15 + degree_value * 2  # Base size + bonus for connections
-        node_size.append(size)
-        
         # Node color based on emotion
         emotion = G.nodes[node].get('emotion', 'Unknown')
         node_color.append(emotion_colors.get(emotion, default_color))
     
-    node_trace = go.Scatter(
-        x=node_x, y=node_y,
+    node_trace = scatter(
+        x=node_xs, y=node_ys,
         mode='markers',
         hoverinfo='text',
         marker=dict(
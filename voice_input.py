@@ -1,12 +1,106 @@
 import streamlit as st
 import speech_recognition as sr
-import tempfile
-import os
+import io
+import hashlib
+
+try:
+    from faster_whisper import WhisperModel
+except ImportError:
+    # Without faster-whisper, audio is sent to the Google Web API
+    WhisperModel = None
+
+# Seconds of audio sent to the recognizer per request
+TRANSCRIPTION_CHUNK_SECONDS = 10
+# Local Whisper model used for transcription when faster-whisper is installed
+WHISPER_MODEL_SIZE = "base.en"
+
+@st.cache_resource(show_spinner=False)
+def _get_whisper_model():
+    """
+    Load the local Whisper model once per process.
+    
+    int8 quantization keeps the model small and fast on CPU.
+    
+    Returns:
+        WhisperModel: The loaded model, or None if faster-whisper isn't
+        installed or the model can't be loaded (e.g. offline without cached
+        weights), in which case the Google Web API is used instead
+    """
+    if WhisperModel is None:
+        return None
+    try:
+        return WhisperModel(WHISPER_MODEL_SIZE, device="cpu", compute_type="int8")
+    except Exception as e:
+        print(f"Error loading Whisper model, falling back to Google Speech Recognition: {e}")
+        return None
+
+def _transcription_backend():
+    """
+    Name the service doing the transcription, for error messages.
+    
+    Returns:
+        str: The local Whisper model or the Google Web API
+    """
+    if _get_whisper_model() is not None:
+        return "the local Whisper model"
+    return "Google Speech Recognition service"
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def _recognize_chunk(chunk_hash, _chunk):
+    """
+    Transcribe one chunk of audio, reusing the result for identical audio.
+    
+    Uses the local Whisper model when it is installed and loads, which
+    avoids a network round-trip per chunk; otherwise the Google Web API.
+    Request errors aren't cached, so they are retried on the next call.
+    
+    Args:
+        chunk_hash (str): blake2b digest of the chunk's audio, used as the cache key
+        _chunk (sr.AudioData): The chunk itself (not hashed by Streamlit)
+        
+    Returns:
+        str: Transcribed text, or empty string if no speech was recognized
+    """
+    model = _get_whisper_model()
+    if model is not None:
+        segments, _ = model.transcribe(io.BytesIO(_chunk.get_wav_data()))
+        return " ".join(segment.text.strip() for segment in segments).strip()
+    try:
+        # Transcribe using Google Web API
+        return sr.Recognizer().recognize_google(_chunk)
+    except sr.UnknownValueError:
+        return ""
+
+def _transcribe_chunks(audio_data):
+    """
+    Transcribe audio in fixed-length chunks, yielding each chunk's text.
+    
+    Each chunk is its own recognition request, so the first words come back
+    before the rest of the recording has been sent. Chunks without any
+    recognizable speech (e.g. silence) are skipped.
+    
+    Args:
+        audio_data (sr.AudioData): The full recording
+        
+    Yields:
+        str: Transcribed text of one chunk, followed by a space
+    """
+    chunk_bytes = TRANSCRIPTION_CHUNK_SECONDS * audio_data.sample_rate * audio_data.sample_width
+    frames = audio_data.frame_data
+    for start in range(0, len(frames), chunk_bytes):
+        chunk_frames = frames[start:start + chunk_bytes]
+        chunk = sr.AudioData(chunk_frames, audio_data.sample_rate, audio_data.sample_width)
+        chunk_hash = hashlib.blake2b(chunk_frames, digest_size=16).hexdigest()
+        text = _recognize_chunk(f"{chunk_hash}-{audio_data.sample_rate}-{audio_data.sample_width}", chunk)
+        if text:
+            yield text + " "
 
 def transcribe_voice():
     """
     Capture audio from a file upload and transcribe it using speech recognition.
     
+    The transcription is streamed to the page chunk by chunk as it arrives.
+    
     Returns:
         str: Transcribed text, or empty string if transcription fails
     """
@@ -25,42 +119,46 @@ def transcribe_voice():
     audio_file = st.file_uploader("Upload audio file for transcription", type=["wav", "mp3"], key="voice_input")
     
     if audio_file:
-        temp_audio_path = None
         try:
-            # Save the audio bytes to a temporary file
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_audio_file:
-                temp_audio_file.write(audio_file.read())
-                temp_audio_path = temp_audio_file.name
-            
-            # Open the temporary audio file with speech_recognition
-            with sr.AudioFile(temp_audio_path) as source:
+            # speech_recognition reads file-like objects, so no temporary file is needed
+            with sr.AudioFile(io.BytesIO(audio_file.read())) as source:
                 audio_data = recognizer.record(source)
-                
-                # Transcribe using Google Web API
-                text = recognizer.recognize_google(audio_data)
-                
-                return text
+            
+            # Show the text as each chunk is transcribed
+            st.markdown("**Transcribed text:**")
+            text = st.write_stream(_transcribe_chunks(audio_data))
+            if not text:
+                raise sr.UnknownValueError()
+            
+            return text.strip()
                 
         except sr.UnknownValueError:
             st.error("Sorry, I could not understand the audio. Please ensure your recording is clear and try again.")
         except sr.RequestError as e:
-            st.error(f"Could not request results from Google Speech Recognition service; {e}")
+            st.error(f"Could not request results from {_transcription_backend()}; {e}")
         except Exception as e:
-            st.error(f"An error occurred during transcription: {e}")
-        finally:
-            # Ensure the temporary file is deleted
-            if temp_audio_path and os.path.exists(temp_audio_path):
-                try:
-                    os.unlink(temp_audio_path)
-                except Exception:
-                    pass
+            st.error(f"An error occurred during transcription with {_transcription_backend()}: {e}")
     
     return ""
 
 
+@st.fragment
+def voice_panel():
+    """
+    Render the voice upload and transcription as its own fragment.
+    
+    Uploading a file only reruns this panel, not the rest of the page. The
+    transcription is stored in st.session_state['transcript'] for the
+    caller to read.
+    """
+    st.session_state['transcript'] = transcribe_voice()
+    if st.session_state['transcript']:
+        st.success("Voice captured successfully!")
+
+
 def transcribe_uploaded_audio(audio_file):
     """
-    Transcribe an uploaded audio file.
+    Transcribe an uploaded audio file without streaming it to the page.
     
     Args:
         audio_file: Streamlit UploadedFile object
@@ -71,34 +169,21 @@ def transcribe_uploaded_audio(audio_file):
     # Create a recognizer instance
     recognizer = sr.Recognizer()
     
-    temp_audio_path = None
     try:
-        # Save the uploaded file to a temporary location
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_audio_file:
-            temp_audio_file.write(audio_file.read())
-            temp_audio_path = temp_audio_file.name
-        
-        # Open the audio file with speech_recognition
-        with sr.AudioFile(temp_audio_path) as source:
+        # Open the uploaded bytes with speech_recognition, without a temporary file
+        with sr.AudioFile(io.BytesIO(audio_file.read())) as source:
             audio_data = recognizer.record(source)
-            
-            # Transcribe using Google Web API
-            text = recognizer.recognize_google(audio_data)
-            
-            return text
+        text = "".join(_transcribe_chunks(audio_data)).strip()
+        if not text:
+            raise sr.UnknownValueError()
+        
+        return text
             
     except sr.UnknownValueError:
         st.error("Sorry, I could not understand the audio. Please ensure your recording is clear and try again.")
     except sr.RequestError as e:
-        st.error(f"Could not request results from Google Speech Recognition service; {e}")
+        st.error(f"Could not request results from {_transcription_backend()}; {e}")
     except Exception as e:
-        st.error(f"An error occurred during transcription: {e}")
-    finally:
-        # Ensure the temporary file is deleted
-        if temp_audio_path and os.path.exists(temp_audio_path):
-            try:
-                os.unlink(temp_audio_path)
-            except Exception:
-                pass
+        st.error(f"An error occurred during transcription with {_transcription_backend()}: {e}")
     
     return ""